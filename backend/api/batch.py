@@ -0,0 +1,86 @@
+"""
+Batch API route.
+
+Collapses several read calls (dashboard stats, document list, results, …)
+into a single HTTP round-trip. Sub-requests are dispatched back into the
+ASGI app concurrently, reusing the normal auth and routing path.
+"""
+import asyncio
+import logging
+from typing import List
+
+import httpx
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["Batch"])
+
+# Only idempotent reads may be batched
+_ALLOWED_PREFIXES = (
+    "/api/dashboard/",
+    "/api/documents",
+    "/api/comparison/",
+    "/api/auth/me",
+)
+MAX_BATCH_REQUESTS = 10
+
+
+class BatchItem(BaseModel):
+    id: str
+    url: str
+    method: str = "GET"
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
+
+@router.post("/batch")
+async def batch(request: Request, body: BatchRequest):
+    """
+    Execute up to MAX_BATCH_REQUESTS GET sub-requests concurrently and return
+    a structured multi-response:
+        {"responses": [{"id": ..., "status": ..., "body": ...}, ...]}
+    """
+    if not body.requests:
+        raise HTTPException(status_code=400, detail="No sub-requests given")
+    if len(body.requests) > MAX_BATCH_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {MAX_BATCH_REQUESTS} sub-requests per batch",
+        )
+
+    # Pass through auth so sub-requests run as the calling user
+    headers = {}
+    auth = request.headers.get("authorization")
+    if auth:
+        headers["Authorization"] = auth
+
+    # Forward the real caller address: the transport's default fake client
+    # ("127.0.0.1", 123) would funnel every user's sub-requests into one
+    # shared rate-limit bucket
+    client_addr = request.scope.get("client") or ("127.0.0.1", 0)
+    transport = httpx.ASGITransport(app=request.app, client=client_addr)
+    async with httpx.AsyncClient(transport=transport, base_url="http://batch") as client:
+
+        async def dispatch(item: BatchItem) -> dict:
+            if item.method.upper() != "GET":
+                return {"id": item.id, "status": 405, "body": {"detail": "Only GET sub-requests are allowed"}}
+            if not item.url.startswith(_ALLOWED_PREFIXES):
+                return {"id": item.id, "status": 400, "body": {"detail": f"URL not batchable: {item.url}"}}
+            try:
+                resp = await client.get(item.url, headers=headers)
+            except Exception as e:
+                logger.error(f"Batch sub-request {item.url} failed: {e}")
+                return {"id": item.id, "status": 502, "body": {"detail": "Sub-request failed"}}
+            try:
+                resp_body = resp.json()
+            except ValueError:
+                resp_body = resp.text
+            return {"id": item.id, "status": resp.status_code, "body": resp_body}
+
+        responses = await asyncio.gather(*(dispatch(item) for item in body.requests))
+
+    return {"responses": list(responses)}
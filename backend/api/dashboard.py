@@ -1,274 +1,193 @@
 """
 Dashboard analytics API routes.
+
+Aggregate stats are precomputed into the `user_dashboard_stats` summary table
+(refreshed by workers at end-of-job, invalidated on upload/delete) so a
+dashboard load is one keyed SELECT plus the small recent-activity query.
 """
 import json
 import logging
+import threading
+import time
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
+from sqlalchemy import String, literal, select, union_all
+
 from dependencies import get_current_user, get_db
-from models.user import User
 from models.document import Document
-from models.contradiction import Contradiction
-from models.clause import Clause
-from models.cross_contradiction import CrossContradiction
 from models.comparison import ComparisonSession
+from models.dashboard_stat import DashboardStat
+from services.dashboard_stats import compute_dashboard_stats
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
 
-
-@router.get("/stats")
-async def get_dashboard_stats(
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """Return real-time analytics for the current user's dashboard."""
-    user_id = current_user["user_id"]
-
-    # ── User's documents ──
-    user_doc_ids = db.query(Document.id).filter(Document.user_id == user_id).subquery()
-
-    total_docs = db.query(func.count(Document.id)).filter(
-        Document.user_id == user_id
-    ).scalar() or 0
-
-    docs_completed = db.query(func.count(Document.id)).filter(
-        Document.user_id == user_id, Document.status == "completed"
-    ).scalar() or 0
-
-    docs_pending = db.query(func.count(Document.id)).filter(
-        Document.user_id == user_id, Document.status == "pending"
-    ).scalar() or 0
-
-    docs_failed = db.query(func.count(Document.id)).filter(
-        Document.user_id == user_id, Document.status == "failed"
-    ).scalar() or 0
-
-    # ── Single-doc contradictions ──
-    single_total = db.query(func.count(Contradiction.id)).filter(
-        Contradiction.document_id.in_(db.query(user_doc_ids))
-    ).scalar() or 0
-
-    single_severity = {}
-    for severity in ["high", "medium", "low"]:
-        count = db.query(func.count(Contradiction.id)).filter(
-            Contradiction.document_id.in_(db.query(user_doc_ids)),
-            Contradiction.severity == severity,
-        ).scalar() or 0
-        single_severity[severity] = count
-
-    single_type_rows = (
-        db.query(Contradiction.type, func.count(Contradiction.id))
-        .filter(Contradiction.document_id.in_(db.query(user_doc_ids)))
-        .group_by(Contradiction.type)
-        .all()
-    )
-
-    # ── Cross-doc contradictions (from user's comparison sessions) ──
-    user_comparison_ids = (
-        db.query(ComparisonSession.id)
-        .filter(ComparisonSession.user_id == user_id)
-        .subquery()
-    )
-
-    cross_total = db.query(func.count(CrossContradiction.id)).filter(
-        CrossContradiction.comparison_id.in_(db.query(user_comparison_ids))
-    ).scalar() or 0
-
-    cross_severity = {}
-    for severity in ["high", "medium", "low"]:
-        count = db.query(func.count(CrossContradiction.id)).filter(
-            CrossContradiction.comparison_id.in_(db.query(user_comparison_ids)),
-            CrossContradiction.severity == severity,
-        ).scalar() or 0
-        cross_severity[severity] = count
-
-    cross_type_rows = (
-        db.query(CrossContradiction.type, func.count(CrossContradiction.id))
-        .filter(CrossContradiction.comparison_id.in_(db.query(user_comparison_ids)))
-        .group_by(CrossContradiction.type)
-        .all()
-    )
-
-    # ── Merge totals ──
-    total_contradictions = single_total + cross_total
-
-    severity_counts = {}
-    for severity in ["high", "medium", "low"]:
-        severity_counts[severity] = single_severity.get(severity, 0) + cross_severity.get(severity, 0)
-
-    type_counts = {}
-    for ctype, count in single_type_rows:
-        type_counts[ctype or "unknown"] = type_counts.get(ctype or "unknown", 0) + count
-    for ctype, count in cross_type_rows:
-        type_counts[ctype or "unknown"] = type_counts.get(ctype or "unknown", 0) + count
-
-    # ── Total clauses ──
-    total_clauses = db.query(func.count(Clause.id)).filter(
-        Clause.document_id.in_(db.query(user_doc_ids))
-    ).scalar() or 0
-
-    # ── Average analysis duration (SQL aggregate — avoids loading all rows) ──
-    from sqlalchemy import extract as sa_extract
-
-    avg_doc_dur = (
-        db.query(
-            func.avg(
-                sa_extract('epoch', Document.analysis_end_time)
-                - sa_extract('epoch', Document.analysis_start_time)
-            )
-        )
-        .filter(
-            Document.user_id == user_id,
-            Document.status == "completed",
-            Document.analysis_start_time.isnot(None),
-            Document.analysis_end_time.isnot(None),
+# ── Short-TTL response cache ──
+# The dashboard is idempotent for seconds at a time (UI polling, refreshes).
+# Entries are keyed by user_id and guarded by a cheap per-user "version"
+# tuple, so any upload, delete or finished analysis is seen immediately
+# while unchanged data skips the aggregate and activity queries.
+_STATS_CACHE_TTL = 30.0   # seconds
+_STATS_CACHE_MAX = 10_000  # entries
+_stats_cache: dict = {}    # user_id -> (expires_at, version, payload)
+_stats_cache_lock = threading.Lock()
+
+
+def _stats_version(user_id: int, db: Session) -> tuple:
+    """Cheap per-user mutation version: row counts + latest completion times.
+
+    Counts catch deletions (which never move a MAX forward); the MAX
+    timestamps catch uploads and finished analyses/comparisons.
+    """
+    doc_row = db.execute(
+        select(
+            func.count(Document.id),
+            func.max(Document.upload_date),
+            func.max(Document.analysis_end_time),
+        ).where(Document.user_id == user_id)
+    ).one()
+    comp_row = db.execute(
+        select(
+            func.count(ComparisonSession.id),
+            func.max(ComparisonSession.completed_at),
+        ).where(ComparisonSession.user_id == user_id)
+    ).one()
+    return tuple(doc_row) + tuple(comp_row)
+
+
+def _as_id_list(value) -> list:
+    """Normalise a document_ids value to a plain list.
+
+    The UNION ALL column inherits the String type of Document.name, so the
+    JSON column may come back un-deserialised depending on the driver.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        return json.loads(value)
+    return list(value)
+
+
+def _build_recent_activity(user_id: int, db: Session) -> list:
+    """Top 5 recent activities (single-doc + comparisons) via one UNION ALL query."""
+    # Contradiction counts come from the worker-maintained denormalized
+    # columns, so neither branch needs a join or GROUP BY
+    q_single = (
+        select(
+            Document.id.label("ref_id"),
+            Document.name.label("label"),
+            literal("single").label("activity_type"),
+            Document.status.label("status"),
+            func.coalesce(Document.analysis_end_time, Document.upload_date).label("date"),
+            func.coalesce(Document.contradiction_count, 0).label("contradictions_found"),
         )
-        .scalar()
+        .where(Document.user_id == user_id, Document.status.in_(["completed", "failed"]))
     )
-    avg_doc_dur = float(avg_doc_dur) if avg_doc_dur is not None else 0.0
 
-    avg_comp_dur = (
-        db.query(
-            func.avg(
-                sa_extract('epoch', ComparisonSession.completed_at)
-                - sa_extract('epoch', ComparisonSession.started_at)
-            )
+    # The comparison label carries the raw document_ids JSON, resolved to
+    # names below. Cast to String: PostgreSQL refuses to UNION the JSONB
+    # column with the varchar Document.name, and _as_id_list re-parses
+    # the serialized form anyway
+    q_comparison = (
+        select(
+            ComparisonSession.id.label("ref_id"),
+            ComparisonSession.document_ids.cast(String).label("label"),
+            literal("comparison").label("activity_type"),
+            ComparisonSession.status.label("status"),
+            func.coalesce(ComparisonSession.completed_at, ComparisonSession.created_at).label("date"),
+            func.coalesce(ComparisonSession.total_cross_contradictions, 0).label("contradictions_found"),
         )
-        .filter(
-            ComparisonSession.user_id == user_id,
-            ComparisonSession.status == "completed",
-            ComparisonSession.started_at.isnot(None),
-            ComparisonSession.completed_at.isnot(None),
-        )
-        .scalar()
+        .where(ComparisonSession.user_id == user_id, ComparisonSession.status.in_(["completed", "failed"]))
     )
-    avg_comp_dur = float(avg_comp_dur) if avg_comp_dur is not None else 0.0
-
-    # ── Comparison sessions count ──
-    total_comparisons = db.query(func.count(ComparisonSession.id)).filter(
-        ComparisonSession.user_id == user_id,
-    ).scalar() or 0
 
-    comparisons_completed = db.query(func.count(ComparisonSession.id)).filter(
-        ComparisonSession.user_id == user_id,
-        ComparisonSession.status == "completed",
-    ).scalar() or 0
+    union = union_all(q_single, q_comparison).subquery()
+    rows = db.execute(
+        select(union).order_by(union.c.date.desc()).limit(5)
+    ).all()
 
-    # Weighted average across both
-    count_doc = docs_completed
-    count_comp = comparisons_completed
-    total_count = count_doc + count_comp
-    avg_duration = round(
-        (avg_doc_dur * count_doc + avg_comp_dur * count_comp) / total_count, 1
-    ) if total_count > 0 else 0.0
-
-    # ── Recent activity (last 5 single-doc + last 5 comparisons, merged & sorted) ──
-    recent_docs = (
-        db.query(Document)
-        .filter(
-            Document.user_id == user_id,
-            Document.status.in_(["completed", "failed"]),
+    # Resolve comparison document names with a single batched lookup
+    all_comp_doc_ids = set()
+    for row in rows:
+        if row.activity_type == "comparison" and row.label:
+            all_comp_doc_ids.update(_as_id_list(row.label))
+    doc_name_map = {}
+    if all_comp_doc_ids:
+        doc_name_map = dict(
+            db.query(Document.id, Document.name).filter(Document.id.in_(all_comp_doc_ids)).all()
         )
-        .order_by(Document.analysis_end_time.desc())
-        .limit(5)
-        .all()
-    )
 
     recent_activity = []
+    for row in rows:
+        if row.activity_type == "single":
+            document_name = row.label
+        else:
+            doc_ids = _as_id_list(row.label)
+            doc_names = [doc_name_map.get(did, "Unknown") for did in doc_ids]
+            document_name = " vs ".join(doc_names[:2])
+            if len(doc_names) > 2:
+                document_name += f" (+{len(doc_names) - 2} more)"
+            document_name = document_name or "Multi-doc comparison"
 
-    # Batch query contradiction counts for recent docs (avoids N+1)
-    recent_doc_ids = [doc.id for doc in recent_docs]
-    if recent_doc_ids:
-        contradiction_counts = dict(
-            db.query(Contradiction.document_id, func.count(Contradiction.id))
-            .filter(Contradiction.document_id.in_(recent_doc_ids))
-            .group_by(Contradiction.document_id)
-            .all()
-        )
-    else:
-        contradiction_counts = {}
-
-    for doc in recent_docs:
         recent_activity.append({
-            "document_name": doc.name,
-            "status": doc.status,
-            "contradictions_found": contradiction_counts.get(doc.id, 0),
-            "date": str(doc.analysis_end_time or doc.upload_date),
-            "activity_type": "single",
+            "document_name": document_name,
+            "status": row.status,
+            "contradictions_found": row.contradictions_found,
+            "date": str(row.date),
+            "activity_type": row.activity_type,
         })
 
-    # Recent comparison sessions
-    recent_comparisons = (
-        db.query(ComparisonSession)
-        .filter(
-            ComparisonSession.user_id == user_id,
-            ComparisonSession.status.in_(["completed", "failed"]),
-        )
-        .order_by(ComparisonSession.completed_at.desc())
-        .limit(5)
-        .all()
-    )
+    return recent_activity
 
-    # Batch query cross-contradiction counts and doc names for comparisons (avoids N+1)
-    recent_comp_ids = [s.id for s in recent_comparisons]
-    if recent_comp_ids:
-        cross_counts = dict(
-            db.query(CrossContradiction.comparison_id, func.count(CrossContradiction.id))
-            .filter(CrossContradiction.comparison_id.in_(recent_comp_ids))
-            .group_by(CrossContradiction.comparison_id)
-            .all()
-        )
-    else:
-        cross_counts = {}
 
-    # Collect all doc IDs referenced by comparison sessions for batch name lookup
-    all_comp_doc_ids = set()
-    for session in recent_comparisons:
-        doc_ids = json.loads(session.document_ids) if session.document_ids else []
-        all_comp_doc_ids.update(doc_ids)
-    if all_comp_doc_ids:
-        doc_name_rows = db.query(Document.id, Document.name).filter(Document.id.in_(all_comp_doc_ids)).all()
-        doc_name_map = {d_id: d_name for d_id, d_name in doc_name_rows}
-    else:
-        doc_name_map = {}
-
-    for session in recent_comparisons:
-        doc_ids = json.loads(session.document_ids) if session.document_ids else []
-        doc_names = [doc_name_map.get(did, "Unknown") for did in doc_ids]
+@router.get("/stats")
+def get_dashboard_stats(
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Return real-time analytics for the current user's dashboard."""
+    user_id = current_user["user_id"]
 
-        display_name = " vs ".join(doc_names[:2])
-        if len(doc_names) > 2:
-            display_name += f" (+{len(doc_names) - 2} more)"
+    # Version-guarded TTL cache: repeated hits within the window and with no
+    # new mutations return the cached payload without touching stats tables
+    version = _stats_version(user_id, db)
+    now = time.monotonic()
+    with _stats_cache_lock:
+        cached = _stats_cache.get(user_id)
+        if cached and cached[0] > now and cached[1] == version:
+            return cached[2]
+
+    # Serve the precomputed row when available; recompute on miss.
+    # ON CONFLICT DO NOTHING makes concurrent misses for the same user
+    # harmless — both computed from the same data, so whichever INSERT
+    # wins, each request returns its own stats
+    row = db.get(DashboardStat, user_id)
+    if row is not None:
+        stats = dict(row.stats)
+    else:
+        stats = compute_dashboard_stats(user_id, db)
+        if db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as _insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as _insert
+        db.execute(
+            _insert(DashboardStat)
+            .values(user_id=user_id, stats=stats)
+            .on_conflict_do_nothing()
+        )
+        db.commit()
 
-        recent_activity.append({
-            "document_name": display_name or "Multi-doc comparison",
-            "status": session.status,
-            "contradictions_found": cross_counts.get(session.id, 0),
-            "date": str(session.completed_at or session.created_at),
-            "activity_type": "comparison",
-        })
+    stats["recent_activity"] = _build_recent_activity(user_id, db)
 
-    # Sort all recent activity by date descending, take top 5
-    recent_activity.sort(key=lambda x: x["date"], reverse=True)
-    recent_activity = recent_activity[:5]
+    with _stats_cache_lock:
+        if len(_stats_cache) >= _STATS_CACHE_MAX:
+            # Drop expired entries; fall back to a full reset if none expired
+            live = {k: v for k, v in _stats_cache.items() if v[0] > now}
+            _stats_cache.clear()
+            if len(live) < _STATS_CACHE_MAX:
+                _stats_cache.update(live)
+        _stats_cache[user_id] = (now + _STATS_CACHE_TTL, version, stats)
 
-    return {
-        "total_documents": total_docs,
-        "documents_analyzed": docs_completed,
-        "documents_pending": docs_pending,
-        "documents_failed": docs_failed,
-        "total_contradictions": total_contradictions,
-        "total_clauses": total_clauses,
-        "contradictions_by_severity": severity_counts,
-        "contradictions_by_type": type_counts,
-        "avg_analysis_duration": avg_duration,
-        "recent_activity": recent_activity,
-        "total_comparisons": total_comparisons,
-        "comparisons_completed": comparisons_completed,
-        "cross_doc_contradictions": cross_total,
-        "single_doc_contradictions": single_total,
-    }
+    return stats
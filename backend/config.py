@@ -13,6 +13,17 @@ class Settings(BaseSettings):
 
     # ── Database ──
     DATABASE_URL: str = "sqlite:///./smartdocchecker.db"
+    # Pool sizing (PostgreSQL only) — sized against the request threadpool so
+    # DB capacity matches request concurrency instead of the 5-connection
+    # SQLAlchemy default
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 5     # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1500  # seconds before a connection is replaced;
+                                 # keep below the server idle timeout
+    # Ping connections on every checkout (SELECT 1 round-trip per request).
+    # Only worth it on flaky networks — recycle covers the normal case
+    DB_STRICT_RECONNECT: bool = False
 
     # ── Supabase Storage ──
     SUPABASE_URL: str = ""
@@ -23,6 +34,14 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "smartdocchecker-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
+    # bcrypt work factor — calibrate so hashing takes ~50-100ms on the target
+    # hardware; login verification is pure CPU and dominates under brute-force
+    # traffic even with rate limits in place
+    BCRYPT_ROUNDS: int = 12
+    # Dedicated bcrypt pool: caps concurrent hashing so auth floods can't
+    # occupy every request thread; beyond pool + queue, logins fail fast (503)
+    BCRYPT_POOL_SIZE: int = 4
+    BCRYPT_QUEUE_MAX: int = 500
 
     # ── CORS ──
     CORS_ORIGINS: List[str] = [
@@ -35,11 +54,41 @@ class Settings(BaseSettings):
     MODEL_CACHE_DIR: str = "./.model_cache"
     HF_TOKEN: str = ""
     NLI_BATCH_SIZE: int = 64
+    # Cap torch intra-op threads so model inference (running on request-pool
+    # threads) doesn't oversubscribe the cores serving HTTP traffic; 0 keeps
+    # the torch default
+    TORCH_NUM_THREADS: int = 0
+    # Dynamic int8 quantization of the SBERT/NLI Linear layers — roughly
+    # halves CPU inference cost at a small accuracy cost; off by default
+    # (torch backend only; the onnx backend quantizes through optimum)
+    MODEL_INT8: bool = False
+    # Inference backend for sentence-transformers: "torch" (default) or
+    # "onnx" (requires optimum[onnxruntime]; ~2.5x faster on CPU)
+    MODEL_BACKEND: str = "torch"
+
+    # ── SQLAlchemy ──
+    # When on, read endpoints add raiseload('*') so any lazy relationship
+    # access raises instead of silently issuing N+1 queries. Enable in
+    # dev/tests; leave off in production if you prefer graceful degradation.
+    SQLA_RAISELOAD: bool = False
+
+    # ── Auth caching ──
+    # How long a verified user row may be served from memory; deleted or
+    # deactivated accounts are noticed within this window
+    USER_CACHE_TTL: float = 60.0
+    USER_CACHE_MAX: int = 10_000
 
     # ── Rate Limiting ──
     RATE_LIMIT_DEFAULT: str = "60/minute"
     RATE_LIMIT_AUTH: str = "10/minute"
     RATE_LIMIT_UPLOAD: str = "20/minute"
+    RATE_LIMIT_ANALYZE_SINGLE: str = "10/minute"
+    RATE_LIMIT_ANALYZE_MULTI: str = "5/minute"
+    # Counter storage. memory:// is per-process; multi-worker deployments
+    # should point this at Redis (e.g. redis://localhost:6379) so an N-worker
+    # setup doesn't silently multiply every limit by N. Requires the redis
+    # client package (pip install limits[redis]).
+    RATE_LIMIT_STORAGE_URI: str = "memory://"
 
     class Config:
         env_file = ".env"
@@ -1,6 +1,7 @@
 """
 Application-wide constants.
 """
+import re
 
 SUPPORTED_FILE_TYPES = [".pdf", ".docx", ".txt"]
 
@@ -17,3 +18,8 @@ STOP_WORDS = frozenset({
     'such', 'also', 'any', 'all', 'each', 'every', 'both', 'other',
     'must', 'minimum', 'maximum',
 })
+
+# Lowercase word tokens of ≥3 letters for the content-word overlap filters —
+# one C-level findall over the lowered text instead of per-word
+# split/strip/length checks in the interpreter
+WORD_RE = re.compile(r"[a-z]{3,}")
@@ -1,19 +1,76 @@
 """
 Password hashing utilities using bcrypt directly.
+
+The work factor comes from settings.BCRYPT_ROUNDS so deployments can
+calibrate hashing cost (target ~50-100ms) without code changes.
+
+All hashing runs through a small dedicated thread pool so a burst of
+logins can saturate at most BCRYPT_POOL_SIZE cores instead of occupying
+every request thread; once pool + queue are full, callers get
+HashingOverloaded immediately rather than piling up behind ~100ms CPU
+jobs. Auth handlers map that to a 503 with Retry-After.
 """
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
 
+from config import settings
+
+
+class HashingOverloaded(Exception):
+    """Raised when the bcrypt pool and its queue are saturated."""
+
+
+_POOL = ThreadPoolExecutor(
+    max_workers=settings.BCRYPT_POOL_SIZE, thread_name_prefix="bcrypt"
+)
+# One slot per running or queued job; acquired non-blocking so saturation
+# is reported instantly instead of queueing unboundedly
+_SLOTS = threading.BoundedSemaphore(
+    settings.BCRYPT_POOL_SIZE + settings.BCRYPT_QUEUE_MAX
+)
+
+
+def _run(fn, *args):
+    if not _SLOTS.acquire(blocking=False):
+        raise HashingOverloaded()
+    try:
+        return _POOL.submit(fn, *args).result()
+    finally:
+        _SLOTS.release()
+
 
 def hash_password(password: str) -> str:
-    """Hash a plaintext password with bcrypt."""
-    return bcrypt.hashpw(
-        password.encode("utf-8"), bcrypt.gensalt()
+    """Hash a plaintext password with bcrypt at the configured work factor."""
+    return _run(
+        bcrypt.hashpw,
+        password.encode("utf-8"),
+        bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS),
     ).decode("utf-8")
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """True when the stored hash was made at a different work factor.
+
+    bcrypt hashes embed their cost ("$2b$12$..."), so after BCRYPT_ROUNDS
+    changes, callers can transparently rehash on the next successful login.
+    """
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return False
+    return rounds != settings.BCRYPT_ROUNDS
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plaintext password against its bcrypt hash."""
-    return bcrypt.checkpw(
+    """Verify a plaintext password against its bcrypt hash.
+
+    bcrypt.checkpw reads the work factor from the stored hash, so hashes
+    created under a previous BCRYPT_ROUNDS setting keep verifying.
+    """
+    return _run(
+        bcrypt.checkpw,
         plain_password.encode("utf-8"),
         hashed_password.encode("utf-8"),
     )
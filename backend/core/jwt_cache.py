@@ -0,0 +1,60 @@
+"""
+Bounded LRU + TTL cache for verified JWT payloads.
+
+Repeat validations of the same token skip the HMAC verification and JSON
+parsing in the JWT library. Entries are keyed by the SHA-256 digest of
+the token (never the raw token), capped at the token's own exp so a
+cached payload can never outlive it, and only successful validations are
+cached. Sized and TTL'd like the user cache in dependencies.py.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+_JWT_CACHE_TTL = 30.0    # seconds
+_JWT_CACHE_MAX = 10_000  # entries
+
+_cache: OrderedDict = OrderedDict()  # sha256(token) -> (expires_at, payload)
+_lock = threading.Lock()
+
+
+def _key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def get(token: str):
+    """Return the cached payload for a token, or None on miss/expiry."""
+    key = _key(token)
+    now = time.time()
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)  # LRU touch
+        return entry[1]
+
+
+def put(token: str, payload: dict) -> None:
+    """Cache a successfully verified payload, honoring its exp claim."""
+    expires_at = time.time() + _JWT_CACHE_TTL
+    exp = payload.get("exp")
+    if exp is not None:
+        expires_at = min(expires_at, float(exp))
+    key = _key(token)
+    with _lock:
+        _cache[key] = (expires_at, payload)
+        _cache.move_to_end(key)
+        while len(_cache) > _JWT_CACHE_MAX:
+            _cache.popitem(last=False)  # evict least recently used
+
+
+def purge_user(user_id: int) -> None:
+    """Drop every cached payload for a user (e.g. on password change)."""
+    with _lock:
+        stale = [k for k, (_, p) in _cache.items() if p.get("user_id") == user_id]
+        for k in stale:
+            del _cache[k]
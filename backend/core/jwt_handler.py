@@ -1,12 +1,24 @@
 """
 JWT token creation and verification.
+
+Uses PyJWT with the cryptography backend, so HMAC-SHA256 is one OpenSSL
+call rather than pure-Python crypto. Key bytes and the algorithm list
+are built once at import.
 """
-from datetime import datetime, timedelta, timezone
+import time
+from datetime import timedelta
 from typing import Optional
 
-from jose import JWTError, jwt
+import jwt
+from jwt import InvalidTokenError as JWTError
 
 from config import settings
+from core import jwt_cache
+
+_KEY = settings.SECRET_KEY.encode()
+_ALGS = [settings.ALGORITHM]
+# Require exp so malformed tokens are rejected before signature work
+_DECODE_OPTIONS = {"require": ["exp"]}
 
 
 def create_access_token(
@@ -14,22 +26,33 @@ def create_access_token(
 ) -> str:
     """Create a signed JWT with the given payload."""
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (
-        expires_delta
-        or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    )
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    # Integer epoch math — JWT exp/iat are NumericDate, so datetime objects
+    # would only be converted right back to this
+    now = int(time.time())
+    if expires_delta is not None:
+        lifetime = int(expires_delta.total_seconds())
+    else:
+        lifetime = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    to_encode.update({"iat": now, "exp": now + lifetime})
+    return jwt.encode(to_encode, _KEY, algorithm=settings.ALGORITHM)
 
 
 def decode_access_token(token: str) -> dict:
     """
     Decode and verify a JWT.
     Raises JWTError on invalid / expired tokens.
+
+    Successful validations are cached briefly (keyed by token digest) so
+    repeat requests with the same bearer token skip the HMAC + JSON work.
+    Failures are never cached.
     """
-    return jwt.decode(
-        token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-    )
+    payload = jwt_cache.get(token)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, _KEY, algorithms=_ALGS, options=_DECODE_OPTIONS)
+    jwt_cache.put(token, payload)
+    return payload
 
 
 # Re-export so callers can catch the right exception.
@@ -0,0 +1,67 @@
+"""
+Rate limiting as pure ASGI middleware.
+
+Limits are enforced before routing and dependency resolution, so a
+throttled request is rejected with 429 without ever checking out a DB
+connection or running auth. Built directly on the `limits` library; the
+counter backend comes from RATE_LIMIT_STORAGE_URI (in-process by
+default, Redis for multi-worker deployments).
+"""
+import logging
+
+from fastapi.responses import JSONResponse
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import MovingWindowRateLimiter
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _route_policies() -> dict:
+    """(method, path) -> parsed limit for the endpoints with custom budgets."""
+    return {
+        ("POST", "/api/auth/register"): parse(settings.RATE_LIMIT_AUTH),
+        ("POST", "/api/auth/login"): parse(settings.RATE_LIMIT_AUTH),
+        ("POST", "/api/documents/upload"): parse(settings.RATE_LIMIT_UPLOAD),
+        ("POST", "/api/analyze/single"): parse(settings.RATE_LIMIT_ANALYZE_SINGLE),
+        ("POST", "/api/analyze/multi"): parse(settings.RATE_LIMIT_ANALYZE_MULTI),
+    }
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying per-route and default per-IP rate limits."""
+
+    def __init__(self, app):
+        self.app = app
+        # memory:// by default; a redis:// URI shares counters across worker
+        # processes (the Redis backend runs its window updates atomically
+        # server-side, so check+hit stays one round trip)
+        self._strategy = MovingWindowRateLimiter(
+            storage_from_string(settings.RATE_LIMIT_STORAGE_URI)
+        )
+        self._policies = _route_policies()
+        self._default = parse(settings.RATE_LIMIT_DEFAULT)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        limit = self._policies.get((scope["method"], path))
+        if limit is None and path.startswith("/api/"):
+            limit = self._default
+
+        if limit is not None:
+            client = scope.get("client")
+            key = client[0] if client else "unknown"
+            if not self._strategy.hit(limit, key, path):
+                response = JSONResponse(
+                    {"detail": f"Rate limit exceeded: {limit}"}, status_code=429
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
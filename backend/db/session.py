@@ -3,15 +3,55 @@ SQLAlchemy engine and session factory.
 """
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from config import settings
 
 _is_sqlite = settings.DATABASE_URL.startswith("sqlite")
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if _is_sqlite else {},
-    pool_pre_ping=not _is_sqlite,  # health-check connections for PostgreSQL
+if _is_sqlite:
+    if ":memory:" in settings.DATABASE_URL:
+        # In-memory SQLite only exists per-connection, so every session must
+        # share the one connection that holds the database
+        engine = create_engine(
+            settings.DATABASE_URL,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    else:
+        # File-backed SQLite keeps the default pool: sharing a single
+        # connection across sessions would interleave transactions — a
+        # status-poll session closing (and triggering reset-on-return
+        # ROLLBACK) could discard a worker's uncommitted writes
+        engine = create_engine(
+            settings.DATABASE_URL,
+            connect_args={"check_same_thread": False},
+        )
+else:
+    engine = create_engine(
+        settings.DATABASE_URL,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        # Recycling below the server idle timeout makes per-checkout pings
+        # redundant on stable networks; DB_STRICT_RECONNECT turns them on
+        pool_pre_ping=settings.DB_STRICT_RECONNECT,
+    )
+
+# Worker progress writes go through an AUTOCOMMIT view of the engine
+# (same pool) so reporting a stage change never commits — and fsyncs —
+# the worker session's open transaction. SQLite stays None: StaticPool
+# shares one connection, so a side write would interleave with the
+# session's transaction on that same connection, and local commits are
+# cheap anyway.
+autocommit_engine = (
+    None if _is_sqlite else engine.execution_options(isolation_level="AUTOCOMMIT")
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False keeps committed objects readable without a
+# re-SELECT; handlers build their responses right after commit, so the
+# refresh round-trip is pure overhead
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
@@ -1,24 +1,18 @@
 """
 Shared FastAPI dependencies.
 """
+import threading
+import time
+
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-
 from core.security import oauth2_scheme
 from core.jwt_handler import decode_access_token, JWTError
 from db.session import SessionLocal
 from models.user import User
 from config import settings
 
-# ── Shared rate limiter (single instance for the whole app) ──
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=[settings.RATE_LIMIT_DEFAULT],
-)
-
 
 def get_db():
     """Yield a SQLAlchemy session, closing it after the request."""
@@ -29,6 +23,21 @@ def get_db():
         db.close()
 
 
+# ── Short-TTL cache for the per-request user-existence lookup ──
+# Deleted/deactivated accounts are noticed within the TTL window; everything
+# else skips one SELECT per authenticated request.
+_USER_CACHE_TTL = settings.USER_CACHE_TTL
+_USER_CACHE_MAX = settings.USER_CACHE_MAX
+_user_cache: dict = {}    # user_id -> (expires_at, user_info dict)
+_user_cache_lock = threading.Lock()
+
+
+def _invalidate_user_cache(user_id: int) -> None:
+    """Drop a cached user entry (e.g. after profile changes)."""
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
@@ -48,6 +57,13 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
+    # Cached existence check — avoids a DB round-trip on every request
+    now = time.monotonic()
+    with _user_cache_lock:
+        cached = _user_cache.get(user_id)
+        if cached and cached[0] > now:
+            return cached[1]
+
     # Verify user still exists (handles deleted / deactivated accounts)
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -57,4 +73,14 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return {"email": user.email, "name": user.name, "user_id": user.id}
+    user_info = {"email": user.email, "name": user.name, "user_id": user.id}
+    with _user_cache_lock:
+        if len(_user_cache) >= _USER_CACHE_MAX:
+            # Drop expired entries; fall back to a full reset if none expired
+            live = {k: v for k, v in _user_cache.items() if v[0] > now}
+            _user_cache.clear()
+            if len(live) < _USER_CACHE_MAX:
+                _user_cache.update(live)
+        _user_cache[user_id] = (now + _USER_CACHE_TTL, user_info)
+
+    return user_info
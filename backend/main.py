@@ -8,20 +8,16 @@ all sub-routers.  Run with:
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
 
 import os
 
 from config import settings
 from api.router import api_router
+from core.rate_limit import RateLimitMiddleware
 from db.session import engine, SessionLocal
 from db.base import Base
-from dependencies import limiter
 
 # ── Import models so Base.metadata knows about them ──
 from models.user import User
@@ -30,6 +26,9 @@ from models.contradiction import Contradiction
 from models.clause import Clause
 from models.comparison import ComparisonSession
 from models.cross_contradiction import CrossContradiction
+from models.dashboard_stat import DashboardStat
+from models.nli_cache import NliCacheEntry
+from models.embedding_cache import EmbeddingCacheEntry
 
 # ── Logging ──
 logging.basicConfig(level=logging.INFO)
@@ -43,6 +42,95 @@ async def lifespan(app: FastAPI):
     try:
         logger.info("Creating database tables (if they don't exist)…")
         Base.metadata.create_all(bind=engine)
+
+        # One-time upgrades for databases created by earlier schema versions —
+        # create_all never alters existing tables. Each step is idempotent:
+        # ADD COLUMN IF NOT EXISTS is a no-op once applied, and the type and
+        # generated-column conversions check information_schema first.
+        if settings.DATABASE_URL.startswith("postgresql"):
+            from sqlalchemy import text as sql_text
+            with engine.begin() as conn:
+                # Denormalized contradiction counter on documents, backfilled
+                # from the live rows so previously analyzed documents don't
+                # report zero until reprocessed. The WHERE keeps re-runs from
+                # touching counts the workers already maintain.
+                conn.execute(sql_text(
+                    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS "
+                    "contradiction_count integer DEFAULT 0"
+                ))
+                conn.execute(sql_text(
+                    "UPDATE documents SET contradiction_count = "
+                    "(SELECT count(*) FROM contradictions "
+                    " WHERE contradictions.document_id = documents.id) "
+                    "WHERE coalesce(contradiction_count, 0) = 0"
+                ))
+
+                # comparison_sessions.document_ids was originally text;
+                # JSONB-typed binds fail against the old column
+                ids_type = conn.execute(sql_text(
+                    "SELECT data_type FROM information_schema.columns "
+                    "WHERE table_name = 'comparison_sessions' AND column_name = 'document_ids'"
+                )).scalar()
+                if ids_type is not None and ids_type != "jsonb":
+                    logger.info("Converting comparison_sessions.document_ids to jsonb…")
+                    conn.execute(sql_text(
+                        "ALTER TABLE comparison_sessions ALTER COLUMN document_ids "
+                        "TYPE jsonb USING document_ids::jsonb"
+                    ))
+
+                # Indexes declared on the models only materialize when
+                # create_all builds the table, so existing deployments need
+                # them created here
+                conn.execute(sql_text(
+                    "CREATE INDEX IF NOT EXISTS ix_documents_user_id_upload_date "
+                    "ON documents (user_id, upload_date DESC)"
+                ))
+                conn.execute(sql_text(
+                    "CREATE INDEX IF NOT EXISTS ix_documents_user_id_status "
+                    "ON documents (user_id, status)"
+                ))
+                conn.execute(sql_text(
+                    "CREATE INDEX IF NOT EXISTS ix_clauses_doc_pos "
+                    "ON clauses (document_id, position)"
+                ))
+                # GIN has no default opclass for plain json — only index the
+                # column when it's jsonb, as the model declares on PostgreSQL
+                ents_udt = conn.execute(sql_text(
+                    "SELECT udt_name FROM information_schema.columns "
+                    "WHERE table_name = 'clauses' AND column_name = 'entities'"
+                )).scalar()
+                if ents_udt == "jsonb":
+                    conn.execute(sql_text(
+                        "CREATE INDEX IF NOT EXISTS ix_clauses_entities_gin "
+                        "ON clauses USING gin (entities)"
+                    ))
+                # HNSW only applies when the embedding column is actually
+                # pgvector (it falls back to packed bytes without the extension)
+                emb_udt = conn.execute(sql_text(
+                    "SELECT udt_name FROM information_schema.columns "
+                    "WHERE table_name = 'clauses' AND column_name = 'embedding'"
+                )).scalar()
+                if emb_udt == "vector":
+                    conn.execute(sql_text(
+                        "CREATE INDEX IF NOT EXISTS ix_clauses_embedding_hnsw "
+                        "ON clauses USING hnsw (embedding vector_cosine_ops)"
+                    ))
+
+                is_generated = conn.execute(sql_text(
+                    "SELECT is_generated FROM information_schema.columns "
+                    "WHERE table_name = 'clauses' AND column_name = 'search_vector'"
+                )).scalar()
+                if is_generated == "NEVER":
+                    logger.info("Converting clauses.search_vector to a generated column…")
+                    conn.execute(sql_text("ALTER TABLE clauses DROP COLUMN search_vector"))
+                    conn.execute(sql_text(
+                        "ALTER TABLE clauses ADD COLUMN search_vector tsvector "
+                        "GENERATED ALWAYS AS (to_tsvector('english', text)) STORED"
+                    ))
+                    conn.execute(sql_text(
+                        "CREATE INDEX IF NOT EXISTS ix_clauses_search_vector "
+                        "ON clauses USING gin (search_vector)"
+                    ))
     except Exception as e:
         logger.error(f"Database table creation failed: {e}")
         logger.warning("App will start without DB — some endpoints may fail.")
@@ -118,9 +206,8 @@ app = FastAPI(
     root_path=os.environ.get("ROOT_PATH", ""),
 )
 
-# ── Rate Limiting Middleware ──
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# ── Rate Limiting Middleware (rejects before routing/dependency resolution) ──
+app.add_middleware(RateLimitMiddleware)
 
 # ── CORS ──
 if not settings.DEBUG and any("localhost" in o for o in settings.CORS_ORIGINS):
@@ -139,18 +226,42 @@ app.add_middleware(
 
 
 # ── Security Headers Middleware ──
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Permissions-Policy"] = "camera=(), microphone=(), geolocation=()"
-    # Prevent caching of authenticated responses
-    if request.url.path.startswith("/api/"):
-        response.headers["Cache-Control"] = "no-store"
-    return response
+# Pure ASGI (no BaseHTTPMiddleware task/stream wrapping): the header list is
+# built once and appended onto the response-start message
+_SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", b"camera=(), microphone=(), geolocation=()"),
+]
+# Prevent caching of authenticated responses
+_NO_STORE_HEADER = (b"cache-control", b"no-store")
+
+
+class SecurityHeadersMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        is_api = scope["path"].startswith("/api/")
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = message.setdefault("headers", [])
+                headers.extend(_SECURITY_HEADERS)
+                if is_api:
+                    headers.append(_NO_STORE_HEADER)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+app.add_middleware(SecurityHeadersMiddleware)
 
 
 # ── Include all API routes ──
@@ -3,12 +3,36 @@ Clause SQLAlchemy ORM model.
 
 Represents an atomic clause extracted from a document.
 """
-from sqlalchemy import Column, String, Integer, Text, ForeignKey, Index, JSON
+import numpy as np
+from sqlalchemy import Column, Computed, String, Integer, Text, ForeignKey, Index, JSON, LargeBinary
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 
 from db.base import Base
 from config import settings
 
+
+class Float16Embedding(TypeDecorator):
+    """Embedding stored as packed float16 bytes (fallback when pgvector is absent).
+
+    384 dims pack to 768 bytes vs ~1.5KB of JSON text, and reads skip the
+    JSON decode entirely. Python-side values stay plain float lists, same as
+    the pgvector column, so call sites don't care which backing type is live.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return np.asarray(value, dtype=np.float16).tobytes()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return np.frombuffer(value, dtype=np.float16).astype(np.float32).tolist()
+
+
 # ── Conditional column types: PostgreSQL-specific or fallback ──
 _is_postgres = settings.DATABASE_URL.startswith("postgresql")
 
@@ -18,13 +42,15 @@ if _is_postgres:
         from pgvector.sqlalchemy import Vector
     except ImportError:
         Vector = None
-    _search_vector_type = TSVECTOR
-    _embedding_type = Vector(384) if Vector else Text
+    # STORED generated column: PostgreSQL fills it at INSERT time, so the
+    # workers never run a post-insert UPDATE to populate it
+    _search_vector_args = (TSVECTOR, Computed("to_tsvector('english', text)", persisted=True))
+    _embedding_type = Vector(384) if Vector else Float16Embedding
     _entities_type = JSONB
 else:
-    _search_vector_type = Text  # unused on SQLite, but column still exists
-    _embedding_type = Text      # store JSON-serialised list on SQLite
-    _entities_type = JSON       # SQLAlchemy generic JSON
+    _search_vector_args = (Text,)    # unused on SQLite, but column still exists
+    _embedding_type = Float16Embedding  # packed f16 bytes on SQLite
+    _entities_type = JSON            # SQLAlchemy generic JSON
 
 
 class Clause(Base):
@@ -36,8 +62,8 @@ class Clause(Base):
     section = Column(String, nullable=True)  # section heading
     position = Column(Integer, nullable=False)  # order in document (0-indexed)
 
-    # Full-text search (PostgreSQL: TSVECTOR, SQLite: plain Text placeholder)
-    search_vector = Column(_search_vector_type, nullable=True)
+    # Full-text search (PostgreSQL: generated TSVECTOR, SQLite: plain Text placeholder)
+    search_vector = Column(*_search_vector_args, nullable=True)
 
     # Semantic embeddings (pgvector 384-d on PG, JSON text on SQLite)
     embedding = Column(_embedding_type, nullable=True)
@@ -48,10 +74,21 @@ class Clause(Base):
     # Relationships
     document = relationship("Document", back_populates="clauses")
 
-    # Indexes — GIN index only on PostgreSQL
+    # Indexes — GIN/HNSW indexes only on PostgreSQL. The composite
+    # (document_id, position) covers the standard "clauses of a document in
+    # order" read without a sort step; the HNSW index serves in-database
+    # approximate nearest-neighbour search over embeddings.
     __table_args__ = (
-        Index('ix_clauses_document_id', 'document_id'),
+        Index('ix_clauses_doc_pos', 'document_id', 'position'),
         *((
             Index('ix_clauses_search_vector', 'search_vector', postgresql_using='gin'),
+            Index('ix_clauses_entities_gin', 'entities', postgresql_using='gin'),
         ) if _is_postgres else ()),
+        *((
+            Index(
+                'ix_clauses_embedding_hnsw', 'embedding',
+                postgresql_using='hnsw',
+                postgresql_ops={'embedding': 'vector_cosine_ops'},
+            ),
+        ) if _is_postgres and Vector else ()),
     )
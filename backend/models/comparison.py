@@ -4,11 +4,19 @@ ComparisonSession SQLAlchemy ORM model.
 Tracks multi-document comparison jobs: which documents are being compared,
 status, timestamps, and the user who initiated the comparison.
 """
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 
 from db.base import Base
+from config import settings
+
+# ── Conditional column type: JSONB on PostgreSQL, generic JSON elsewhere ──
+if settings.DATABASE_URL.startswith("postgresql"):
+    from sqlalchemy.dialects.postgresql import JSONB
+    _document_ids_type = JSONB
+else:
+    _document_ids_type = JSON
 
 
 class ComparisonSession(Base):
@@ -19,7 +27,7 @@ class ComparisonSession(Base):
     status = Column(String, nullable=False, default="pending")  # pending | processing | completed | failed
     processing_stage = Column(String, nullable=True)  # Current pipeline stage
     progress_percent = Column(Integer, nullable=True, default=0)  # 0-100
-    document_ids = Column(Text, nullable=False)  # JSON-encoded list of document IDs
+    document_ids = Column(_document_ids_type, nullable=False)  # native list of document IDs
     total_cross_contradictions = Column(Integer, default=0)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     started_at = Column(DateTime, nullable=True)
@@ -1,7 +1,7 @@
 """
 Contradiction SQLAlchemy ORM model.
 """
-from sqlalchemy import Column, String, Float, ForeignKey
+from sqlalchemy import Column, String, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from db.base import Base
@@ -21,3 +21,8 @@ class Contradiction(Base):
 
     document = relationship("Document", back_populates="contradictions")
 
+    # Composite index so JOIN + severity aggregates are index-only scans
+    __table_args__ = (
+        Index('ix_contradictions_document_id_severity', 'document_id', 'severity'),
+    )
+
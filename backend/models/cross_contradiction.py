@@ -4,7 +4,7 @@ CrossContradiction SQLAlchemy ORM model.
 Represents a contradiction found between clauses from different documents
 during a multi-document comparison session.
 """
-from sqlalchemy import Column, String, Float, Integer, ForeignKey, Text
+from sqlalchemy import Column, String, Float, Integer, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 
 from db.base import Base
@@ -33,3 +33,8 @@ class CrossContradiction(Base):
     comparison = relationship("ComparisonSession", back_populates="cross_contradictions")
     document_a = relationship("Document", foreign_keys=[document_a_id])
     document_b = relationship("Document", foreign_keys=[document_b_id])
+
+    # Composite index so JOIN + severity aggregates are index-only scans
+    __table_args__ = (
+        Index('ix_cross_contradictions_comparison_id_severity', 'comparison_id', 'severity'),
+    )
@@ -0,0 +1,28 @@
+"""
+DashboardStat SQLAlchemy ORM model.
+
+Per-user precomputed dashboard aggregates. Workers refresh the row when an
+analysis job finishes; upload/delete endpoints invalidate it so the next
+dashboard load recomputes. Serving the dashboard then costs one keyed SELECT
+instead of re-scanning documents/contradictions on every page load.
+"""
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, JSON
+from datetime import datetime, timezone
+
+from db.base import Base
+from config import settings
+
+# ── Conditional column type: JSONB on PostgreSQL, generic JSON elsewhere ──
+if settings.DATABASE_URL.startswith("postgresql"):
+    from sqlalchemy.dialects.postgresql import JSONB
+    _stats_type = JSONB
+else:
+    _stats_type = JSON
+
+
+class DashboardStat(Base):
+    __tablename__ = "user_dashboard_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    stats = Column(_stats_type, nullable=False)
+    computed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -1,7 +1,7 @@
 """
 Document SQLAlchemy ORM model.
 """
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 
@@ -17,6 +17,7 @@ class Document(Base):
     status = Column(String, nullable=False, default="pending")
     processing_stage = Column(String, nullable=True)  # Current pipeline stage
     progress_percent = Column(Integer, nullable=True, default=0)  # 0-100
+    contradiction_count = Column(Integer, default=0)  # denormalized; worker-maintained
     upload_date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     analysis_start_time = Column(DateTime, nullable=True)
     analysis_end_time = Column(DateTime, nullable=True)
@@ -25,3 +26,10 @@ class Document(Base):
     contradictions = relationship("Contradiction", back_populates="document", cascade="all, delete-orphan")
     clauses = relationship("Clause", back_populates="document", cascade="all, delete-orphan")
 
+    # Composite indexes: list_documents does user_id + ORDER BY upload_date DESC,
+    # the dashboard aggregates count by user_id + status
+    __table_args__ = (
+        Index('ix_documents_user_id_upload_date', user_id, upload_date.desc()),
+        Index('ix_documents_user_id_status', 'user_id', 'status'),
+    )
+
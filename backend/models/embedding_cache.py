@@ -0,0 +1,25 @@
+"""
+Embedding cache ORM model.
+
+Clause texts recur across reprocessing runs and across documents
+(boilerplate clauses especially), and the SBERT vector for a given text
+never changes for a given model. Caching vectors by content hash lets
+those texts skip the encoder forward pass entirely.
+"""
+from sqlalchemy import Column, String, LargeBinary
+
+from db.base import Base
+
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+
+    # blake2b-128 hex digest of the clause text
+    text_hash = Column(String, primary_key=True)
+
+    # The model name is part of the key, so swapping the embedding model
+    # naturally invalidates every cached vector
+    model_ver = Column(String, primary_key=True)
+
+    # Packed float32 bytes — decoded with np.frombuffer on read
+    vector = Column(LargeBinary, nullable=False)
@@ -0,0 +1,27 @@
+"""
+NLI result cache ORM model.
+
+Cross-encoder scores depend only on the two texts and the model, so they
+are cached by content hash. Re-running a comparison — or reprocessing a
+document, which regenerates clause ids but not texts — skips the
+transformer forward pass for every pair already scored.
+"""
+from sqlalchemy import Column, String, Float
+
+from db.base import Base
+
+
+class NliCacheEntry(Base):
+    __tablename__ = "nli_cache"
+
+    # "<blake2b(text_a)>/<blake2b(text_b)>" in scored orientation — NLI is
+    # asymmetric, so (a, b) and (b, a) are distinct entries
+    pair_key = Column(String, primary_key=True)
+
+    # The model name is part of the key, so swapping the NLI model
+    # naturally invalidates every cached score
+    model_ver = Column(String, primary_key=True)
+
+    contradiction_score = Column(Float, nullable=False)
+    entailment_score = Column(Float, nullable=False)
+    neutral_score = Column(Float, nullable=False)
@@ -4,6 +4,11 @@ Pydantic schemas for user-related request / response models.
 import re
 from pydantic import BaseModel, field_validator
 
+# Compiled once at import — validators run on the request hot path
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_HAS_LETTER_RE = re.compile(r'[A-Za-z]')
+_HAS_DIGIT_RE = re.compile(r'\d')
+
 
 class UserRegister(BaseModel):
     name: str
@@ -20,8 +25,7 @@ class UserRegister(BaseModel):
     @field_validator("email")
     @classmethod
     def email_valid(cls, v: str) -> str:
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(pattern, v):
+        if not _EMAIL_RE.match(v):
             raise ValueError("Invalid email address")
         return v.lower().strip()
 
@@ -30,9 +34,9 @@ class UserRegister(BaseModel):
     def password_strong(cls, v: str) -> str:
         if len(v) < 8:
             raise ValueError("Password must be at least 8 characters")
-        if not re.search(r'[A-Za-z]', v):
+        if not _HAS_LETTER_RE.search(v):
             raise ValueError("Password must contain at least one letter")
-        if not re.search(r'\d', v):
+        if not _HAS_DIGIT_RE.search(v):
             raise ValueError("Password must contain at least one digit")
         return v
 
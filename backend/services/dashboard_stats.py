@@ -0,0 +1,204 @@
+"""
+Dashboard stats service.
+
+Computes per-user aggregate dashboard stats and maintains the precomputed
+`user_dashboard_stats` summary table. Workers refresh the row at end-of-job;
+upload/delete endpoints invalidate it so the next dashboard load recomputes.
+"""
+import logging
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+
+from models.document import Document
+from models.contradiction import Contradiction
+from models.clause import Clause
+from models.cross_contradiction import CrossContradiction
+from models.comparison import ComparisonSession
+from models.dashboard_stat import DashboardStat
+
+logger = logging.getLogger(__name__)
+
+
+def compute_dashboard_stats(user_id: int, db: Session) -> dict:
+    """Compute all aggregate dashboard stats for a user (excludes recent activity)."""
+    # One conditional-aggregate query returns all four document-status counts
+    # (FILTER clause on PostgreSQL, CASE fallback elsewhere)
+    total_docs, docs_completed, docs_pending, docs_failed = (
+        db.query(
+            func.count(Document.id),
+            func.count(Document.id).filter(Document.status == "completed"),
+            func.count(Document.id).filter(Document.status == "pending"),
+            func.count(Document.id).filter(Document.status == "failed"),
+        )
+        .filter(Document.user_id == user_id)
+        .one()
+    )
+
+    # ── Single-doc contradictions (total + severity histogram in one query) ──
+    single_total, single_high, single_medium, single_low = (
+        db.query(
+            func.count(Contradiction.id),
+            func.count(Contradiction.id).filter(Contradiction.severity == "high"),
+            func.count(Contradiction.id).filter(Contradiction.severity == "medium"),
+            func.count(Contradiction.id).filter(Contradiction.severity == "low"),
+        )
+        .join(Document, Contradiction.document_id == Document.id)
+        .filter(Document.user_id == user_id)
+        .one()
+    )
+    single_severity = {"high": single_high, "medium": single_medium, "low": single_low}
+
+    single_type_rows = (
+        db.query(Contradiction.type, func.count(Contradiction.id))
+        .join(Document, Contradiction.document_id == Document.id)
+        .filter(Document.user_id == user_id)
+        .group_by(Contradiction.type)
+        .all()
+    )
+
+    # ── Cross-doc contradictions (from user's comparison sessions) ──
+    cross_total, cross_high, cross_medium, cross_low = (
+        db.query(
+            func.count(CrossContradiction.id),
+            func.count(CrossContradiction.id).filter(CrossContradiction.severity == "high"),
+            func.count(CrossContradiction.id).filter(CrossContradiction.severity == "medium"),
+            func.count(CrossContradiction.id).filter(CrossContradiction.severity == "low"),
+        )
+        .join(ComparisonSession, CrossContradiction.comparison_id == ComparisonSession.id)
+        .filter(ComparisonSession.user_id == user_id)
+        .one()
+    )
+    cross_severity = {"high": cross_high, "medium": cross_medium, "low": cross_low}
+
+    cross_type_rows = (
+        db.query(CrossContradiction.type, func.count(CrossContradiction.id))
+        .join(ComparisonSession, CrossContradiction.comparison_id == ComparisonSession.id)
+        .filter(ComparisonSession.user_id == user_id)
+        .group_by(CrossContradiction.type)
+        .all()
+    )
+
+    # ── Merge totals ──
+    total_contradictions = single_total + cross_total
+
+    severity_counts = {}
+    for severity in ["high", "medium", "low"]:
+        severity_counts[severity] = single_severity.get(severity, 0) + cross_severity.get(severity, 0)
+
+    type_counts = {}
+    for ctype, count in single_type_rows:
+        type_counts[ctype or "unknown"] = type_counts.get(ctype or "unknown", 0) + count
+    for ctype, count in cross_type_rows:
+        type_counts[ctype or "unknown"] = type_counts.get(ctype or "unknown", 0) + count
+
+    # ── Total clauses ──
+    total_clauses = (
+        db.query(func.count(Clause.id))
+        .join(Document, Clause.document_id == Document.id)
+        .filter(Document.user_id == user_id)
+        .scalar()
+        or 0
+    )
+
+    # ── Average analysis duration (SQL aggregate — avoids loading all rows) ──
+    from sqlalchemy import extract as sa_extract
+
+    avg_doc_dur = (
+        db.query(
+            func.avg(
+                sa_extract('epoch', Document.analysis_end_time)
+                - sa_extract('epoch', Document.analysis_start_time)
+            )
+        )
+        .filter(
+            Document.user_id == user_id,
+            Document.status == "completed",
+            Document.analysis_start_time.isnot(None),
+            Document.analysis_end_time.isnot(None),
+        )
+        .scalar()
+    )
+    avg_doc_dur = float(avg_doc_dur) if avg_doc_dur is not None else 0.0
+
+    avg_comp_dur = (
+        db.query(
+            func.avg(
+                sa_extract('epoch', ComparisonSession.completed_at)
+                - sa_extract('epoch', ComparisonSession.started_at)
+            )
+        )
+        .filter(
+            ComparisonSession.user_id == user_id,
+            ComparisonSession.status == "completed",
+            ComparisonSession.started_at.isnot(None),
+            ComparisonSession.completed_at.isnot(None),
+        )
+        .scalar()
+    )
+    avg_comp_dur = float(avg_comp_dur) if avg_comp_dur is not None else 0.0
+
+    # ── Comparison sessions count (total + completed in one query) ──
+    total_comparisons, comparisons_completed = (
+        db.query(
+            func.count(ComparisonSession.id),
+            func.count(ComparisonSession.id).filter(ComparisonSession.status == "completed"),
+        )
+        .filter(ComparisonSession.user_id == user_id)
+        .one()
+    )
+
+    # Weighted average across both
+    count_doc = docs_completed
+    count_comp = comparisons_completed
+    total_count = count_doc + count_comp
+    avg_duration = round(
+        (avg_doc_dur * count_doc + avg_comp_dur * count_comp) / total_count, 1
+    ) if total_count > 0 else 0.0
+
+    return {
+        "total_documents": total_docs,
+        "documents_analyzed": docs_completed,
+        "documents_pending": docs_pending,
+        "documents_failed": docs_failed,
+        "total_contradictions": total_contradictions,
+        "total_clauses": total_clauses,
+        "contradictions_by_severity": severity_counts,
+        "contradictions_by_type": type_counts,
+        "avg_analysis_duration": avg_duration,
+        "total_comparisons": total_comparisons,
+        "comparisons_completed": comparisons_completed,
+        "cross_doc_contradictions": cross_total,
+        "single_doc_contradictions": single_total,
+    }
+
+
+def refresh_dashboard_stats(user_id: int, db: Session) -> None:
+    """Recompute and upsert the precomputed stats row for a user.
+
+    Called by workers when an analysis/comparison job finishes.
+    """
+    stats = compute_dashboard_stats(user_id, db)
+    # Upsert in one statement: two workers finishing jobs for the same user
+    # can race, and add-vs-add would die on the primary key. The update arm
+    # lets the loser overwrite with its (equally fresh) recomputation
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as _insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as _insert
+    stmt = _insert(DashboardStat).values(
+        user_id=user_id, stats=stats, computed_at=datetime.now(timezone.utc)
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[DashboardStat.user_id],
+        set_={"stats": stmt.excluded.stats, "computed_at": stmt.excluded.computed_at},
+    ))
+    db.commit()
+
+
+def invalidate_dashboard_stats(user_id: int, db: Session) -> None:
+    """Drop the cached stats row so the next dashboard load recomputes.
+
+    Runs within the caller's transaction — the caller commits.
+    """
+    db.query(DashboardStat).filter(DashboardStat.user_id == user_id).delete()
@@ -1,4 +1,5 @@
 """Enhanced embedding service with batch generation and similarity search."""
+import hashlib
 import logging
 import threading
 import numpy as np
@@ -6,21 +7,41 @@ from typing import List, Tuple
 from sqlalchemy.orm import Session
 from models.clause import Clause
 
+try:
+    import simsimd  # SIMD (AVX-512/NEON) cosine kernels
+except ImportError:
+    simsimd = None
+
 logger = logging.getLogger(__name__)
 
 import os
 from config import settings
 
+# In-database ANN search needs PostgreSQL with the pgvector column live
+# (same guard as models/clause.py uses to pick the column type)
+_PG_ANN = False
+if settings.DATABASE_URL.startswith("postgresql"):
+    try:
+        from pgvector.sqlalchemy import Vector  # noqa: F401
+        _PG_ANN = True
+    except ImportError:
+        pass
+
 _sbert_model = None
 _sbert_lock = threading.Lock()
 
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
 def _load_sbert_model():
     global _sbert_model
     if _sbert_model is None:
         with _sbert_lock:
             if _sbert_model is None:  # double-checked locking
                 from sentence_transformers import SentenceTransformer
-                model_name = "all-MiniLM-L6-v2"
+                from services.model_runtime import configure_torch, detect_device, maybe_quantize
+                configure_torch()
+                device = detect_device()
+                model_name = EMBEDDING_MODEL_NAME
 
                 # Ensure cache dir exists
                 os.makedirs(settings.MODEL_CACHE_DIR, exist_ok=True)
@@ -30,18 +51,27 @@ def _load_sbert_model():
                     _sbert_model = SentenceTransformer(
                         model_name,
                         cache_folder=settings.MODEL_CACHE_DIR,
-                        local_files_only=True
+                        local_files_only=True,
+                        device=device,
+                        backend=settings.MODEL_BACKEND
                     )
-                    logger.info(f"Loaded SBERT model from local cache: {model_name}")
+                    logger.info(f"Loaded SBERT model from local cache: {model_name} (device={device})")
                 except Exception:
                     # Fallback to download
                     logger.info(f"Model {model_name} not found locally. Downloading to {settings.MODEL_CACHE_DIR}...")
                     _sbert_model = SentenceTransformer(
                         model_name,
                         cache_folder=settings.MODEL_CACHE_DIR,
-                        token=settings.HF_TOKEN if settings.HF_TOKEN else None
+                        token=settings.HF_TOKEN if settings.HF_TOKEN else None,
+                        device=device,
+                        backend=settings.MODEL_BACKEND
                     )
-                    logger.info(f"Downloaded and loaded SBERT model: {model_name}")
+                    logger.info(f"Downloaded and loaded SBERT model: {model_name} (device={device})")
+
+                # int8 dynamic quantization is a CPU/torch-only optimization;
+                # the onnx backend handles quantization through optimum
+                if device == "cpu" and settings.MODEL_BACKEND == "torch":
+                    _sbert_model = maybe_quantize(_sbert_model)
 
 
 def semantic_similarity(text1: str, text2: str) -> float:
@@ -53,28 +83,145 @@ def semantic_similarity(text1: str, text2: str) -> float:
     return util.pytorch_cos_sim(emb1, emb2).item()
 
 
-def generate_embeddings_batch(texts: List[str], chunk_size: int = 50) -> List[List[float]]:
-    """Generate embeddings for a batch of texts with interval logging."""
+def generate_embeddings_batch(texts: List[str], chunk_size: int = 50) -> np.ndarray:
+    """Generate embeddings for a batch of texts, sorted by length for batching.
+
+    Transformer batches pad to the longest sequence, so feeding length-sorted
+    texts keeps each internal batch near-uniform and avoids wasting compute on
+    padding tokens. Results are scattered back to the caller's order.
+
+    Returns a float32 array of shape (len(texts), dim) — rows go straight into
+    the embedding column without a tolist() round-trip through Python floats.
+    """
     _load_sbert_model()
-    
+
     if not texts:
-        return []
+        return np.empty((0, 0), dtype=np.float32)
+
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    encoded = _sbert_model.encode(
+        [texts[i] for i in order],
+        batch_size=chunk_size,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    ).astype(np.float32, copy=False)
+
+    embeddings = np.empty_like(encoded)
+    embeddings[order] = encoded
+
+    logger.info(f"Generated {len(texts)} embeddings.")
+    return embeddings
+
+
+def generate_embeddings_cached(texts: List[str], db) -> np.ndarray:
+    """Generate embeddings with a persistent content-hash cache.
+
+    A clause text's vector is fully determined by (text, model), so vectors
+    are cached in the embedding_cache table keyed by blake2b(text). Cached
+    texts skip the encoder forward pass; only misses go through
+    generate_embeddings_batch, and their vectors are written back for the
+    next run. Returns the same (len(texts), dim) float32 array layout.
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    from models.embedding_cache import EmbeddingCacheEntry
+
+    hashes = [hashlib.blake2b(t.encode(), digest_size=16).hexdigest() for t in texts]
+
+    # Chunked IN lookups keep statements within parameter limits
+    cached: dict = {}
+    LOOKUP_CHUNK = 500
+    unique_hashes = list(dict.fromkeys(hashes))
+    for i in range(0, len(unique_hashes), LOOKUP_CHUNK):
+        rows = db.query(EmbeddingCacheEntry).filter(
+            EmbeddingCacheEntry.model_ver == EMBEDDING_MODEL_NAME,
+            EmbeddingCacheEntry.text_hash.in_(unique_hashes[i:i + LOOKUP_CHUNK]),
+        ).all()
+        for row in rows:
+            cached[row.text_hash] = np.frombuffer(row.vector, dtype=np.float32)
+
+    miss_idx = [i for i, h in enumerate(hashes) if h not in cached]
+    fresh = generate_embeddings_batch([texts[i] for i in miss_idx])
+    if cached:
+        logger.info(f"Embedding cache: {len(texts) - len(miss_idx)}/{len(texts)} texts served from cache")
+
+    dim = fresh.shape[1] if len(miss_idx) else next(iter(cached.values())).shape[0]
+    embeddings = np.empty((len(texts), dim), dtype=np.float32)
+    for i, h in enumerate(hashes):
+        vec = cached.get(h)
+        if vec is not None:
+            embeddings[i] = vec
+    for row_idx, i in enumerate(miss_idx):
+        embeddings[i] = fresh[row_idx]
+
+    # Persist fresh vectors; ON CONFLICT DO NOTHING makes concurrent
+    # workers embedding the same text harmless
+    if len(miss_idx):
+        if db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as _insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as _insert
+        new_rows = {}
+        for row_idx, i in enumerate(miss_idx):
+            new_rows[hashes[i]] = dict(
+                text_hash=hashes[i],
+                model_ver=EMBEDDING_MODEL_NAME,
+                vector=fresh[row_idx].tobytes(),
+            )
+        db.execute(_insert(EmbeddingCacheEntry).values(list(new_rows.values())).on_conflict_do_nothing())
+        db.commit()
 
-    total_texts = len(texts)
-    if total_texts <= chunk_size:
-        embeddings = _sbert_model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
-        return embeddings.tolist()
+    return embeddings
 
-    all_embeddings = []
-    for i in range(0, total_texts, chunk_size):
-        end = min(i + chunk_size, total_texts)
-        chunk = texts[i:end]
-        logger.info(f"Generating embeddings: {i}/{total_texts} clauses processed...")
-        chunk_embeddings = _sbert_model.encode(chunk, convert_to_numpy=True, show_progress_bar=False)
-        all_embeddings.extend(chunk_embeddings.tolist())
-    
-    logger.info(f"Successfully generated {total_texts} embeddings in total.")
-    return all_embeddings
+
+def quantize_i8(matrix: np.ndarray) -> np.ndarray:
+    """Quantize L2-normalized rows to int8 by scaling to ±127.
+
+    SimSIMD's int8 cosine kernel then runs on VNNI/NEON integer dot
+    products with 4× less memory traffic than float32. Entries of a
+    normalized row lie in [-1, 1], so the per-score quantization error is
+    well under 0.01 — callers screen slightly below their float threshold
+    and re-rank borderline pairs in float32 when exactness matters.
+    """
+    return np.clip(np.round(matrix * 127.0), -127, 127).astype(np.int8)
+
+
+# ── Per-document normalized embedding matrix cache ──
+# Embeddings come back from the DB as Python lists; stacking and normalizing
+# them costs more than the similarity search itself, so the float32 matrix is
+# kept per document, validated against the clause-id tuple it was built from.
+_DOC_MATRIX_CACHE_MAX = 256  # documents
+_doc_matrix_cache: dict = {}  # document_id -> (clause_ids tuple, norm matrix)
+_doc_matrix_lock = threading.Lock()
+
+
+def invalidate_doc_matrix(document_id: str) -> None:
+    """Drop the cached matrix for a document (call when its clauses change)."""
+    with _doc_matrix_lock:
+        _doc_matrix_cache.pop(document_id, None)
+
+
+def normalized_doc_matrix(document_id: str, clauses: List[Clause]) -> np.ndarray:
+    """Return the row-normalized float32 embedding matrix for these clauses.
+
+    Cached per document so repeat lookups — and whole comparison sessions —
+    skip the N list→array conversions of ORM-fetched embeddings.
+    """
+    clause_ids = tuple(c.id for c in clauses)
+    with _doc_matrix_lock:
+        entry = _doc_matrix_cache.get(document_id)
+        if entry is not None and entry[0] == clause_ids:
+            return entry[1]
+
+    matrix = np.asarray([c.embedding for c in clauses], dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+
+    with _doc_matrix_lock:
+        while len(_doc_matrix_cache) >= _DOC_MATRIX_CACHE_MAX:
+            _doc_matrix_cache.pop(next(iter(_doc_matrix_cache)))
+        _doc_matrix_cache[document_id] = (clause_ids, matrix)
+    return matrix
 
 
 def find_similar_clauses(
@@ -86,8 +233,20 @@ def find_similar_clauses(
     preloaded_clauses: List[Clause] = None
 ) -> List[Tuple[Clause, float]]:
     """Find similar clauses using cosine similarity. Uses preloaded clauses if provided to avoid DB hits."""
-    query_vec = np.array(query_embedding)
-    
+    # On PostgreSQL+pgvector, push the search into the database: the HNSW
+    # index answers top-k in sublinear time and only k rows come back,
+    # instead of transferring and scoring every clause in Python
+    if preloaded_clauses is None and db is not None and _PG_ANN:
+        distance = Clause.embedding.cosine_distance(query_embedding)
+        rows = (
+            db.query(Clause, (1 - distance).label("sim"))
+            .filter(Clause.document_id == document_id, Clause.embedding.isnot(None))
+            .order_by(distance)
+            .limit(top_k)
+            .all()
+        )
+        return [(clause, float(sim)) for clause, sim in rows if sim >= threshold]
+
     # Use preloaded clauses or fetch from DB
     if preloaded_clauses is not None:
         clauses = [c for c in preloaded_clauses if c.embedding is not None]
@@ -99,18 +258,31 @@ def find_similar_clauses(
     else:
         logger.error("Neither db nor preloaded_clauses provided to find_similar_clauses")
         return []
-    
-    results = []
-    for clause in clauses:
-        clause_vec = np.array(clause.embedding)
-        denom = np.linalg.norm(query_vec) * np.linalg.norm(clause_vec)
-        if denom == 0:
-            continue
-        similarity = np.dot(query_vec, clause_vec) / denom
-        
-        if similarity >= threshold:
-            results.append((clause, float(similarity)))
-    
-    # Sort by similarity descending
-    results.sort(key=lambda x: x[1], reverse=True)
-    return results[:top_k]
+
+    if not clauses:
+        return []
+
+    query_vec = np.asarray(query_embedding, dtype=np.float32)
+    query_norm = np.linalg.norm(query_vec)
+    if query_norm == 0:
+        return []
+
+    # Score every clause against the cached row-normalized matrix for this
+    # document — SimSIMD's fused dot+norm kernel when available (runtime
+    # dispatch to AVX-512/NEON), otherwise one BLAS matrix-vector product
+    matrix = normalized_doc_matrix(document_id, clauses)
+    q_norm = query_vec / query_norm
+    if simsimd is not None:
+        sims = 1.0 - np.asarray(simsimd.cdist(q_norm[None, :], matrix, metric="cos"))[0]
+    else:
+        sims = matrix @ q_norm
+
+    # Threshold, then top-k via argpartition (avoids a full sort of N scores)
+    idx = np.flatnonzero(sims >= threshold)
+    if idx.size == 0:
+        return []
+    if idx.size > top_k:
+        idx = idx[np.argpartition(-sims[idx], top_k)[:top_k]]
+    idx = idx[np.argsort(-sims[idx])]
+
+    return [(clauses[i], float(sims[i])) for i in idx]
@@ -0,0 +1,77 @@
+"""
+Shared torch runtime configuration for the model services.
+
+Applied once, by whichever model loads first. The workers run inference
+on threads from the request pool, so unbounded intra-op parallelism
+makes every encode/predict call fight the web server (and the other
+model) for the same cores.
+"""
+import logging
+import os
+import threading
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_configured = False
+_lock = threading.Lock()
+
+
+def configure_torch() -> None:
+    """Cap torch thread pools before the first forward pass builds them.
+
+    Intra-op threads come from TORCH_NUM_THREADS, or min(8, cpu_count) when
+    unset — transformer encode gains little beyond ~8 threads. Inter-op is
+    pinned to 1: the models run single ops back to back, and a second pool
+    only adds contention with the request threads.
+    """
+    global _configured
+    if _configured:
+        return
+    with _lock:
+        if _configured:
+            return
+        import torch
+
+        num_threads = settings.TORCH_NUM_THREADS or min(8, os.cpu_count() or 1)
+        torch.set_num_threads(num_threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Raises if an op already ran and sized the pool; keep the default
+            pass
+        logger.info(f"torch threads: intra-op={num_threads}, inter-op=1")
+        _configured = True
+
+
+def detect_device() -> str:
+    """Pick the best available inference device: cuda > mps > cpu."""
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            return "cuda"
+        if torch.backends.mps.is_available():
+            return "mps"
+    except Exception:
+        pass
+    return "cpu"
+
+
+def maybe_quantize(module):
+    """Return module dynamic-quantized to int8, or unchanged when MODEL_INT8 is off.
+
+    Dynamic quantization rewrites the Linear layers to int8 kernels, cutting
+    memory bandwidth and roughly doubling CPU matmul throughput; weights stay
+    FP32 on disk, so the flag can be toggled per deployment.
+    """
+    if not settings.MODEL_INT8:
+        return module
+    import torch
+
+    quantized = torch.quantization.quantize_dynamic(
+        module, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    logger.info(f"Applied int8 dynamic quantization to {type(module).__name__}")
+    return quantized
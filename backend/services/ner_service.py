@@ -5,6 +5,7 @@ Extracts structured entities from clause text and provides entity-based
 contradiction detection (dates, money, people, orgs, locations, etc.).
 """
 import logging
+import os
 import re
 import threading
 from typing import List, Dict, Optional, Tuple
@@ -16,6 +17,9 @@ logger = logging.getLogger(__name__)
 _nlp = None
 _nlp_lock = threading.Lock()
 
+# Batch size above which NER fans out across worker processes
+_NER_MULTIPROC_THRESHOLD = 500
+
 
 def _load_nlp():
     """Lazy-load the spaCy model once (thread-safe)."""
@@ -25,7 +29,12 @@ def _load_nlp():
             if _nlp is None:  # double-checked locking
                 import spacy
                 try:
-                    _nlp = spacy.load("en_core_web_sm", disable=["parser", "lemmatizer"])
+                    # NER only needs tok2vec + ner; tagger and attribute_ruler
+                    # just add per-doc cost for labels nothing reads
+                    _nlp = spacy.load(
+                        "en_core_web_sm",
+                        disable=["parser", "lemmatizer", "tagger", "attribute_ruler"],
+                    )
                 except OSError:
                     logger.warning("spaCy model 'en_core_web_sm' not found – NER features disabled")
                     return None
@@ -35,6 +44,17 @@ def _load_nlp():
     return _nlp
 
 
+def _normalize_entity_text(text: str) -> str:
+    """Collapse internal whitespace in an entity span.
+
+    Spans are almost always already clean, so only pay for the split/join
+    when the text actually contains a newline, tab or doubled space.
+    """
+    if "\n" in text or "\t" in text or "  " in text:
+        return " ".join(text.split())
+    return text
+
+
 # ── Entity labels we care about for contradiction detection ──
 _ENTITY_LABELS = {
     "PERSON", "ORG", "GPE", "LOC",     # who / where
@@ -69,8 +89,7 @@ def extract_entities(text: str) -> Dict[str, List[str]]:
     for ent in doc.ents:
         if ent.label_ not in _ENTITY_LABELS:
             continue
-        # Normalise whitespace
-        val = " ".join(ent.text.split())
+        val = _normalize_entity_text(ent.text)
         key = (ent.label_, val.lower())
         if key in seen:
             continue
@@ -92,21 +111,32 @@ def extract_entities_batch(texts: List[str]) -> List[Dict[str, List[str]]]:
         return [{} for _ in texts]
 
     total = len(texts)
+    # en_core_web_sm is fork-safe (no transformer), so large batches can fan
+    # out across processes; below the cutoff the worker-spawn cost dominates
+    pipe_kwargs = {"batch_size": 128}
+    if total >= _NER_MULTIPROC_THRESHOLD:
+        pipe_kwargs = {"batch_size": 256, "n_process": max(1, (os.cpu_count() or 1) // 2)}
+
+    # Length-sorted dispatch: tok2vec pads each internal batch to its
+    # longest member, so feeding near-uniform lengths avoids wasted
+    # convolutions on padding. Results scatter back to the caller's order
+    order = sorted(range(total), key=lambda i: len(texts[i]))
+
     log_interval = max(1, total // 5)  # log at ~20%, 40%, 60%, 80%, 100%
-    results: List[Dict[str, List[str]]] = []
-    for i, doc in enumerate(nlp.pipe(texts, batch_size=128)):
+    results: List[Dict[str, List[str]]] = [{} for _ in range(total)]
+    for i, doc in enumerate(nlp.pipe((texts[idx] for idx in order), **pipe_kwargs)):
         entities: Dict[str, List[str]] = {}
         seen: set = set()
         for ent in doc.ents:
             if ent.label_ not in _ENTITY_LABELS:
                 continue
-            val = " ".join(ent.text.split())
+            val = _normalize_entity_text(ent.text)
             key = (ent.label_, val.lower())
             if key in seen:
                 continue
             seen.add(key)
             entities.setdefault(ent.label_, []).append(val)
-        results.append(entities)
+        results[order[i]] = entities
 
         if (i + 1) % log_interval == 0 or (i + 1) == total:
             logger.info(f"NER progress: {i + 1}/{total} clauses processed")
@@ -118,6 +148,67 @@ def extract_entities_batch(texts: List[str]) -> List[Dict[str, List[str]]]:
 #  Entity-based contradiction detection
 # ─────────────────────────────────────────────────────────────────
 
+# Label groups compared against each other: (labels, type, severity,
+# description template, confidence)
+_LABEL_GROUP_SPECS = (
+    (("DATE", "TIME"), "date", "high", "Date/time conflict: {a} vs {b}", 0.85),
+    (("MONEY", "PERCENT"), "financial", "high", "Financial conflict: {a} vs {b}", 0.88),
+    (("PERSON", "ORG"), "entity", "medium", "Entity conflict: {a} vs {b}", 0.75),
+    (("GPE", "LOC"), "location", "medium", "Location conflict: {a} vs {b}", 0.78),
+    (("QUANTITY", "CARDINAL"), "quantity", "medium", "Quantity conflict: {a} vs {b}", 0.80),
+)
+
+
+def prepare_entity_groups(ents: Dict[str, List[str]]):
+    """Merge and lowercase a clause's entity values per label group.
+
+    Done once per clause so the O(N²) pair loop compares precomputed
+    frozensets instead of re-lowering every entity string per pair.
+    Returns None when the clause has no entities.
+    """
+    if not ents:
+        return None
+    groups = []
+    for labels, *_ in _LABEL_GROUP_SPECS:
+        vals: List[str] = []
+        for label in labels:
+            vals.extend(ents.get(label, []))
+        groups.append((vals, frozenset(v.lower() for v in vals)))
+    return groups
+
+
+def check_entity_conflicts_prepared(clause_a, clause_b, groups_a, groups_b) -> List[Dict]:
+    """Compare two clauses' prepared entity groups (see prepare_entity_groups).
+
+    The caller is responsible for the length/topical-overlap guards.
+    """
+    violations: List[Dict] = []
+    for spec, (vals_a, set_a), (vals_b, set_b) in zip(_LABEL_GROUP_SPECS, groups_a, groups_b):
+        if not vals_a or not vals_b:
+            continue
+
+        # Only flag if the sets are completely disjoint (different values)
+        if set_a.isdisjoint(set_b):
+            # Extra guard: if combined entity count is very high (>4), it is
+            # likely an enumeration ("members include A, B, C") not a conflict
+            if len(set_a) + len(set_b) > 4:
+                continue
+
+            _, contra_type, severity, desc_template, confidence = spec
+            violations.append({
+                "clause_a": clause_a,
+                "clause_b": clause_b,
+                "type": contra_type,
+                "severity": severity,
+                "description": desc_template.format(
+                    a=", ".join(vals_a[:3]),
+                    b=", ".join(vals_b[:3]),
+                ),
+                "confidence": confidence,
+            })
+    return violations
+
+
 def check_entity_contradictions(clause_a, clause_b,
                                  ents_a: Dict[str, List[str]],
                                  ents_b: Dict[str, List[str]]) -> List[Dict]:
@@ -155,110 +246,7 @@ def check_entity_contradictions(clause_a, clause_b,
     if overlap < 0.50:
         return []
 
-    violations: List[Dict] = []
-
-    # 1. Date / time conflicts
-    _check_label_conflict(
-        clause_a, clause_b, ents_a, ents_b,
-        labels=["DATE", "TIME"],
-        contra_type="date",
-        severity="high",
-        desc_template="Date/time conflict: {a} vs {b}",
-        confidence=0.85,
-        violations=violations,
+    return check_entity_conflicts_prepared(
+        clause_a, clause_b,
+        prepare_entity_groups(ents_a), prepare_entity_groups(ents_b),
     )
-
-    # 2. Money / percent conflicts
-    _check_label_conflict(
-        clause_a, clause_b, ents_a, ents_b,
-        labels=["MONEY", "PERCENT"],
-        contra_type="financial",
-        severity="high",
-        desc_template="Financial conflict: {a} vs {b}",
-        confidence=0.88,
-        violations=violations,
-    )
-
-    # 3. Person / org conflicts
-    _check_label_conflict(
-        clause_a, clause_b, ents_a, ents_b,
-        labels=["PERSON", "ORG"],
-        contra_type="entity",
-        severity="medium",
-        desc_template="Entity conflict: {a} vs {b}",
-        confidence=0.75,
-        violations=violations,
-    )
-
-    # 4. Location conflicts
-    _check_label_conflict(
-        clause_a, clause_b, ents_a, ents_b,
-        labels=["GPE", "LOC"],
-        contra_type="location",
-        severity="medium",
-        desc_template="Location conflict: {a} vs {b}",
-        confidence=0.78,
-        violations=violations,
-    )
-
-    # 5. Quantity conflicts
-    _check_label_conflict(
-        clause_a, clause_b, ents_a, ents_b,
-        labels=["QUANTITY", "CARDINAL"],
-        contra_type="quantity",
-        severity="medium",
-        desc_template="Quantity conflict: {a} vs {b}",
-        confidence=0.80,
-        violations=violations,
-    )
-
-    return violations
-
-
-def _check_label_conflict(
-    clause_a, clause_b,
-    ents_a: Dict[str, List[str]],
-    ents_b: Dict[str, List[str]],
-    labels: List[str],
-    contra_type: str,
-    severity: str,
-    desc_template: str,
-    confidence: float,
-    violations: List[Dict],
-):
-    """
-    Compare entities of given label(s) between two clauses.
-    If both clauses contain entities of the same label but with different
-    values, record a violation.
-    """
-    vals_a: List[str] = []
-    vals_b: List[str] = []
-    for label in labels:
-        vals_a.extend(ents_a.get(label, []))
-        vals_b.extend(ents_b.get(label, []))
-
-    if not vals_a or not vals_b:
-        return
-
-    set_a = {v.lower() for v in vals_a}
-    set_b = {v.lower() for v in vals_b}
-
-    # Only flag if the sets are completely disjoint (different values)
-    # AND the overlap is not caused by additive/enumerative clauses
-    if set_a and set_b and set_a.isdisjoint(set_b):
-        # Extra guard: if combined entity count is very high (>4), it is
-        # likely an enumeration ("members include A, B, C") not a conflict
-        if len(set_a) + len(set_b) > 4:
-            return
-
-        violations.append({
-            "clause_a": clause_a,
-            "clause_b": clause_b,
-            "type": contra_type,
-            "severity": severity,
-            "description": desc_template.format(
-                a=", ".join(vals_a[:3]),
-                b=", ".join(vals_b[:3]),
-            ),
-            "confidence": confidence,
-        })
@@ -1,4 +1,5 @@
 """NLI service using lightweight cross-encoder model."""
+import hashlib
 import logging
 import threading
 import numpy as np
@@ -12,13 +13,18 @@ _nli_lock = threading.Lock()
 import os
 from config import settings
 
+NLI_MODEL_NAME = 'cross-encoder/nli-distilroberta-base'
+
 def _load_nli_model():
     global _nli_model
     if _nli_model is None:
         with _nli_lock:
             if _nli_model is None:  # double-checked locking
                 from sentence_transformers import CrossEncoder
-                model_name = 'cross-encoder/nli-distilroberta-base'
+                from services.model_runtime import configure_torch, detect_device, maybe_quantize
+                configure_torch()
+                device = detect_device()
+                model_name = NLI_MODEL_NAME
 
                 # Ensure cache dir exists
                 os.makedirs(settings.MODEL_CACHE_DIR, exist_ok=True)
@@ -28,18 +34,28 @@ def _load_nli_model():
                     _nli_model = CrossEncoder(
                         model_name,
                         cache_folder=settings.MODEL_CACHE_DIR,
-                        local_files_only=True
+                        local_files_only=True,
+                        device=device,
+                        backend=settings.MODEL_BACKEND
                     )
-                    logger.info(f"Loaded NLI model from local cache: {model_name}")
+                    logger.info(f"Loaded NLI model from local cache: {model_name} (device={device})")
                 except Exception:
                     # Fallback to download
                     logger.info(f"Model {model_name} not found locally. Downloading to {settings.MODEL_CACHE_DIR}...")
                     _nli_model = CrossEncoder(
                         model_name,
                         cache_folder=settings.MODEL_CACHE_DIR,
-                        token=settings.HF_TOKEN if settings.HF_TOKEN else None
+                        token=settings.HF_TOKEN if settings.HF_TOKEN else None,
+                        device=device,
+                        backend=settings.MODEL_BACKEND
                     )
-                    logger.info(f"Downloaded and loaded NLI model: {model_name}")
+                    logger.info(f"Downloaded and loaded NLI model: {model_name} (device={device})")
+
+                # CrossEncoder wraps the HF model; quantize the inner module
+                # (int8 dynamic quantization is a CPU/torch-only optimization;
+                # the onnx backend handles quantization through optimum)
+                if device == "cpu" and settings.MODEL_BACKEND == "torch":
+                    _nli_model.model = maybe_quantize(_nli_model.model)
 
 
 def detect_contradiction(text1: str, text2: str) -> float:
@@ -55,15 +71,36 @@ def batch_nli_check(pairs: List[Tuple[str, str, str, str]]) -> List[Dict]:
     """Batch NLI check on clause pairs. Returns softmax probabilities."""
     if not pairs:
         return []
-    
+
     _load_nli_model()
-    
-    # Prepare pairs for model
-    text_pairs = [(p[0], p[1]) for p in pairs]
-    logits = _nli_model.predict(text_pairs, batch_size=settings.NLI_BATCH_SIZE)
-    
-    # Convert all logits to probabilities in one vectorized call
-    all_probs = _softmax_batch(np.array(logits))
+
+    # Deduplicate identical (text1, text2) pairs — candidate generation can
+    # emit repeats, and each one costs a full cross-encoder forward pass.
+    # Ordering is NOT canonicalized: NLI is asymmetric, (a, b) != (b, a).
+    unique_pairs: List[Tuple[str, str]] = []
+    unique_index: Dict[Tuple[str, str], int] = {}
+    dedup_map = []
+    for p in pairs:
+        tp = (p[0], p[1])
+        idx = unique_index.get(tp)
+        if idx is None:
+            idx = len(unique_pairs)
+            unique_index[tp] = idx
+            unique_pairs.append(tp)
+        dedup_map.append(idx)
+
+    # Predict unique pairs sorted by combined text length so each batch pads
+    # to its own longest member rather than the global outlier, then scatter
+    # the logits back into unique order
+    order = sorted(range(len(unique_pairs)), key=lambda i: len(unique_pairs[i][0]) + len(unique_pairs[i][1]))
+    sorted_logits = _nli_model.predict(
+        [unique_pairs[i] for i in order], batch_size=settings.NLI_BATCH_SIZE
+    )
+    logits = np.empty_like(np.asarray(sorted_logits))
+    logits[order] = np.asarray(sorted_logits)
+
+    # Probabilities for unique pairs, expanded back to one row per input pair
+    all_probs = _softmax_batch(logits)[dedup_map]
     
     results = []
     for i, (text1, text2, id1, id2) in enumerate(pairs):
@@ -79,17 +116,103 @@ def batch_nli_check(pairs: List[Tuple[str, str, str, str]]) -> List[Dict]:
     return results
 
 
+def batch_nli_check_cached(pairs: List[Tuple[str, str, str, str]], db) -> List[Dict]:
+    """Batch NLI check backed by the persistent nli_cache table.
+
+    The scores depend only on (text_a, text_b, model), so entries are keyed
+    by content hashes — reprocessing a document regenerates clause ids but
+    not texts, and identical clause pairs across documents share one entry.
+    Pairs already scored by an earlier run are served from the table; only
+    the rest pay the cross-encoder forward pass, and their fresh scores are
+    written back for the next run.
+    """
+    if not pairs:
+        return []
+
+    from models.nli_cache import NliCacheEntry
+
+    # Hash each distinct text once; the key keeps the (premise, hypothesis)
+    # orientation because NLI is asymmetric
+    text_hashes: Dict[str, str] = {}
+    for text_a, text_b, _, _ in pairs:
+        for t in (text_a, text_b):
+            if t not in text_hashes:
+                text_hashes[t] = hashlib.blake2b(t.encode(), digest_size=16).hexdigest()
+    keys = [f"{text_hashes[text_a]}/{text_hashes[text_b]}" for text_a, text_b, _, _ in pairs]
+
+    # Chunked IN lookups keep statements within parameter limits
+    cached: Dict[str, NliCacheEntry] = {}
+    LOOKUP_CHUNK = 500
+    unique_keys = list(dict.fromkeys(keys))
+    for i in range(0, len(unique_keys), LOOKUP_CHUNK):
+        rows = db.query(NliCacheEntry).filter(
+            NliCacheEntry.model_ver == NLI_MODEL_NAME,
+            NliCacheEntry.pair_key.in_(unique_keys[i:i + LOOKUP_CHUNK]),
+        ).all()
+        for row in rows:
+            cached[row.pair_key] = row
+
+    fresh_pairs = []
+    fresh_keys = []
+    for p, k in zip(pairs, keys):
+        if k not in cached:
+            fresh_pairs.append(p)
+            fresh_keys.append(k)
+    fresh_results = batch_nli_check(fresh_pairs)
+    if cached:
+        logger.info(f"NLI cache: {len(pairs) - len(fresh_pairs)}/{len(pairs)} pairs served from cache")
+
+    # Persist fresh scores; ON CONFLICT DO NOTHING makes concurrent
+    # sessions scoring the same pair harmless
+    if fresh_results:
+        if db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as _insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as _insert
+        new_rows = {}
+        for key, r in zip(fresh_keys, fresh_results):
+            new_rows[key] = dict(
+                pair_key=key,
+                model_ver=NLI_MODEL_NAME,
+                contradiction_score=r["contradiction_score"],
+                entailment_score=r["entailment_score"],
+                neutral_score=r["neutral_score"],
+            )
+        db.execute(_insert(NliCacheEntry).values(list(new_rows.values())).on_conflict_do_nothing())
+        db.commit()
+
+    # Merge back in the caller's pair order
+    fresh_iter = iter(fresh_results)
+    results = []
+    for (_, _, id_a, id_b), key in zip(pairs, keys):
+        row = cached.get(key)
+        if row is not None:
+            results.append({
+                "clause_a_id": id_a,
+                "clause_b_id": id_b,
+                "contradiction_score": row.contradiction_score,
+                "entailment_score": row.entailment_score,
+                "neutral_score": row.neutral_score,
+            })
+        else:
+            results.append(next(fresh_iter))
+    return results
+
+
 def _softmax(logits) -> np.ndarray:
     """Numerically stable softmax for a single logit vector."""
-    x = np.array(logits, dtype=np.float64)
-    x = x - np.max(x)  # stability
-    e = np.exp(x)
-    return e / e.sum()
+    # float32 matches the model output; in-place exp avoids a temp array
+    x = np.array(logits, dtype=np.float32)
+    x -= np.max(x)  # stability
+    np.exp(x, out=x)
+    x /= x.sum()
+    return x
 
 
 def _softmax_batch(logits: np.ndarray) -> np.ndarray:
     """Vectorized softmax over rows of a 2-D logit matrix."""
-    x = logits.astype(np.float64)
-    x = x - x.max(axis=1, keepdims=True)
-    e = np.exp(x)
-    return e / e.sum(axis=1, keepdims=True)
+    x = np.array(logits, dtype=np.float32)
+    x -= x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
@@ -1,60 +1,146 @@
 """Rule-based contradiction checker with NER-enhanced detection."""
 import re
 import logging
-from typing import List, Dict
+from functools import lru_cache
+from typing import Dict, List
 
-from services.ner_service import check_entity_contradictions
+from services.ner_service import check_entity_conflicts_prepared, prepare_entity_groups
 from constants import STOP_WORDS
 
 logger = logging.getLogger(__name__)
 
+# Precompiled pair-check patterns — compiled once instead of per pair
+_MODALS_STRONG_RE = re.compile(r'\b(must|shall|required|mandatory|obligatory)\b', re.IGNORECASE)
+_MODALS_WEAK_RE = re.compile(r'\b(may|can|optional|permitted|allowed)\b', re.IGNORECASE)
+_AUTHORITY_RE = re.compile(r'\b(responsible|authority|department|team|manager|director)\b', re.IGNORECASE)
+_CAP_ENTITY_RE = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
 
-def _content_overlap(text_a: str, text_b: str) -> float:
-    """Return overlap ratio using content words only (stop words removed)."""
-    wa = {w for w in text_a.lower().split() if w not in STOP_WORDS and len(w) > 2}
-    wb = {w for w in text_b.lower().split() if w not in STOP_WORDS and len(w) > 2}
+
+@lru_cache(maxsize=4096)
+def _content_words(text: str) -> frozenset:
+    """Content words of a text (lowercased, stop words and short tokens removed).
+
+    Memoized: lower/split/filter allocates one string per token, and the same
+    clause texts recur across batch runs (reprocessing, multi-doc comparisons),
+    so repeated set construction is the dominant allocator load here.
+    """
+    return frozenset(w for w in text.lower().split() if w not in STOP_WORDS and len(w) > 2)
+
+
+def _overlap_ratio(wa: frozenset, wb: frozenset) -> float:
+    """Overlap ratio between two precomputed content-word sets."""
     if not wa or not wb:
         return 0.0
     return len(wa & wb) / max(len(wa), len(wb))
 
 
+def _content_overlap(text_a: str, text_b: str) -> float:
+    """Return overlap ratio using content words only (stop words removed)."""
+    return _overlap_ratio(_content_words(text_a), _content_words(text_b))
+
+
+def _clause_features(clause) -> Dict:
+    """Precompute everything the pair checks need from a single clause.
+
+    The pair loop is O(N²); running splits/regexes/number extraction there
+    means each clause's text is re-scanned N times. This runs once per clause
+    so the pair loop is left with set intersections and flag comparisons.
+    """
+    text = clause.text
+    has_authority = bool(_AUTHORITY_RE.search(text))
+    numbers = _extract_numbers(text)
+    return {
+        "clause": clause,
+        "word_count": len(text.split()),
+        "content_words": _content_words(text),
+        "numbers": numbers,
+        "numbers_sorted": sorted(numbers),
+        "has_strong": bool(_MODALS_STRONG_RE.search(text)),
+        "has_weak": bool(_MODALS_WEAK_RE.search(text)),
+        "has_authority": has_authority,
+        # Capitalised entities only matter for the authority check
+        "cap_entities": _CAP_ENTITY_RE.findall(text) if has_authority else [],
+    }
+
+
 def check_contradictions_batch(clauses: List, entities_map: Dict[str, Dict] = None) -> List[Dict]:
     """Check for rule-based contradictions in clause pairs.
-    
+
     Args:
         clauses: List of Clause ORM objects.
         entities_map: Optional mapping of clause_id -> {label: [values]}.
                       If provided, NER-based entity checks are applied.
     """
     violations = []
-    
-    for i, clause_a in enumerate(clauses):
-        for clause_b in clauses[i+1:]:
+    features = [_clause_features(c) for c in clauses]
+
+    # Every check requires >= 8 words on both sides and content-word overlap
+    # of at least 0.40 (entity: 0.50, modal/authority: 0.55), so instead of
+    # enumerating all N^2 pairs, walk an inverted index from content word to
+    # clause index and only score pairs that share words. The shared-word
+    # count IS the intersection size, so the overlap computed here is exact
+    # and the surviving candidate set — overlap >= 0.40 — is output-identical
+    # to the full scan.
+    eligible = [i for i, f in enumerate(features)
+                if f["word_count"] >= 8 and f["content_words"]]
+
+    # Merge + lowercase each clause's entities per label group once, instead
+    # of per pair inside the entity checks
+    prepared_entities: Dict[str, object] = {}
+    if entities_map:
+        prepared_entities = {
+            cid: prepare_entity_groups(ents) for cid, ents in entities_map.items()
+        }
+    inverted: Dict[str, List[int]] = {}
+    for i in eligible:
+        for word in features[i]["content_words"]:
+            inverted.setdefault(word, []).append(i)
+
+    for i in eligible:
+        feat_a = features[i]
+        clause_a = feat_a["clause"]
+        words_a = feat_a["content_words"]
+        len_a = len(words_a)
+
+        shared_counts: Dict[int, int] = {}
+        for word in words_a:
+            for j in inverted[word]:
+                if j > i:
+                    shared_counts[j] = shared_counts.get(j, 0) + 1
+
+        for j in sorted(shared_counts):
+            feat_b = features[j]
+            clause_b = feat_b["clause"]
+            overlap = shared_counts[j] / max(len_a, len(feat_b["content_words"]))
+            if overlap < 0.40:
+                continue
+
             # Numeric mismatch
-            num_violation = check_numeric_mismatch(clause_a, clause_b)
+            num_violation = _numeric_mismatch(feat_a, feat_b, overlap)
             if num_violation:
                 violations.append(num_violation)
-            
+
             # Modal mismatch
-            modal_violation = check_modal_mismatch(clause_a, clause_b)
+            modal_violation = _modal_mismatch(feat_a, feat_b, overlap)
             if modal_violation:
                 violations.append(modal_violation)
-            
+
             # Authority mismatch
-            auth_violation = check_authority_mismatch(clause_a, clause_b)
+            auth_violation = _authority_mismatch(feat_a, feat_b, overlap)
             if auth_violation:
                 violations.append(auth_violation)
-            
-            # NER entity-based checks
-            if entities_map:
-                ents_a = entities_map.get(clause_a.id, {})
-                ents_b = entities_map.get(clause_b.id, {})
-                if ents_a or ents_b:
-                    entity_violations = check_entity_contradictions(
-                        clause_a, clause_b, ents_a, ents_b
-                    )
-                    violations.extend(entity_violations)
-    
+
+            # NER entity-based checks — the word-count guard is covered by
+            # `eligible` and the topical-overlap guard (>= 0.50) applied here,
+            # so the pair check is pure set arithmetic on prepared groups
+            if entities_map and overlap >= 0.50:
+                groups_a = prepared_entities.get(clause_a.id)
+                groups_b = prepared_entities.get(clause_b.id)
+                if groups_a and groups_b:
+                    violations.extend(check_entity_conflicts_prepared(
+                        clause_a, clause_b, groups_a, groups_b
+                    ))
+
     return violations
 
 
@@ -72,11 +158,18 @@ _NUMBER_WORDS = {
 }
 
 
+# Digit numbers (with optional decimal part) and the punctuation stripped
+# from word candidates — translate() runs the strip at C speed in one pass
+_DIGIT_NUM_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WORD_PUNCT_TABLE = str.maketrans('', '', ',;.!?')
+_DIGIT_ONLY_RE = re.compile(r'^\d+(?:\.\d+)?$')
+
+
 def _extract_numbers(text: str) -> List[str]:
     """Extract all numeric values from text, including number-words."""
-    nums = re.findall(r'\b\d+(?:\.\d+)?\b', text)
+    nums = _DIGIT_NUM_RE.findall(text)
     for word in text.lower().split():
-        clean = re.sub(r'[,;.!?]', '', word)
+        clean = word.translate(_WORD_PUNCT_TABLE)
         if clean in _NUMBER_WORDS:
             nums.append(_NUMBER_WORDS[clean])
     return nums
@@ -87,11 +180,10 @@ def _extract_number_with_context(text: str) -> List[Dict]:
     words = text.split()
     results = []
     for i, word in enumerate(words):
-        clean = re.sub(r'[,;.!?]', '', word)
+        clean = word.translate(_WORD_PUNCT_TABLE)
         num = None
         # Check digit numbers
-        m = re.match(r'^\d+(?:\.\d+)?$', clean)
-        if m:
+        if _DIGIT_ONLY_RE.match(clean):
             num = clean
         # Check number-words
         elif clean.lower() in _NUMBER_WORDS:
@@ -145,28 +237,28 @@ def _build_numeric_description(text_a: str, text_b: str, nums_a: List[str], nums
     return f"Numeric conflict: values differ between statements"
 
 
-def check_numeric_mismatch(clause_a, clause_b) -> Dict:
-    """Detect numeric contradictions between structurally similar sentences."""
+def _numeric_mismatch(feat_a: Dict, feat_b: Dict, overlap: float) -> Dict:
+    """Numeric contradiction check over precomputed features."""
     # Skip clauses that are too short to carry meaningful numeric context
-    if len(clause_a.text.split()) < 8 or len(clause_b.text.split()) < 8:
+    if feat_a["word_count"] < 8 or feat_b["word_count"] < 8:
         return None
 
-    nums_a = _extract_numbers(clause_a.text)
-    nums_b = _extract_numbers(clause_b.text)
-
-    if not nums_a or not nums_b:
+    if not feat_a["numbers"] or not feat_b["numbers"]:
         return None
 
     # Numbers must actually differ
-    if sorted(nums_a) == sorted(nums_b):
+    if feat_a["numbers_sorted"] == feat_b["numbers_sorted"]:
         return None
 
     # Sentences must share substantial structure (content-word overlap)
-    overlap = _content_overlap(clause_a.text, clause_b.text)
     if overlap < 0.40:
         return None
 
-    description = _build_numeric_description(clause_a.text, clause_b.text, nums_a, nums_b)
+    clause_a = feat_a["clause"]
+    clause_b = feat_b["clause"]
+    description = _build_numeric_description(
+        clause_a.text, clause_b.text, feat_a["numbers"], feat_b["numbers"]
+    )
 
     return {
         "clause_a": clause_a,
@@ -178,28 +270,19 @@ def check_numeric_mismatch(clause_a, clause_b) -> Dict:
     }
 
 
-def check_modal_mismatch(clause_a, clause_b) -> Dict:
-    """Detect modal contradictions (must vs may, required vs optional)."""
-    modals_strong = r'\b(must|shall|required|mandatory|obligatory)\b'
-    modals_weak = r'\b(may|can|optional|permitted|allowed)\b'
-    
-    has_strong_a = bool(re.search(modals_strong, clause_a.text, re.IGNORECASE))
-    has_weak_a = bool(re.search(modals_weak, clause_a.text, re.IGNORECASE))
-    has_strong_b = bool(re.search(modals_strong, clause_b.text, re.IGNORECASE))
-    has_weak_b = bool(re.search(modals_weak, clause_b.text, re.IGNORECASE))
-    
+def _modal_mismatch(feat_a: Dict, feat_b: Dict, overlap: float) -> Dict:
+    """Modal contradiction check over precomputed features."""
     # Check if same topic with conflicting modals
-    if (has_strong_a and has_weak_b) or (has_weak_a and has_strong_b):
+    if (feat_a["has_strong"] and feat_b["has_weak"]) or \
+       (feat_a["has_weak"] and feat_b["has_strong"]):
         # Skip short noise clauses
-        if len(clause_a.text.split()) < 8 or len(clause_b.text.split()) < 8:
+        if feat_a["word_count"] < 8 or feat_b["word_count"] < 8:
             return None
         # Require near-identical sentence structure (high content-word overlap)
-        overlap = _content_overlap(clause_a.text, clause_b.text)
-        
         if overlap > 0.55:
             return {
-                "clause_a": clause_a,
-                "clause_b": clause_b,
+                "clause_a": feat_a["clause"],
+                "clause_b": feat_b["clause"],
                 "type": "modal",
                 "severity": "medium",
                 "description": "Modal mismatch: mandatory vs optional",
@@ -208,32 +291,43 @@ def check_modal_mismatch(clause_a, clause_b) -> Dict:
     return None
 
 
-def check_authority_mismatch(clause_a, clause_b) -> Dict:
-    """Detect authority/responsibility contradictions."""
-    # Look for authority patterns
-    authority_pattern = r'\b(responsible|authority|department|team|manager|director)\b'
-    
-    if re.search(authority_pattern, clause_a.text, re.IGNORECASE) and \
-       re.search(authority_pattern, clause_b.text, re.IGNORECASE):
+def _authority_mismatch(feat_a: Dict, feat_b: Dict, overlap: float) -> Dict:
+    """Authority contradiction check over precomputed features."""
+    if feat_a["has_authority"] and feat_b["has_authority"]:
         # Skip noise clauses
-        if len(clause_a.text.split()) < 8 or len(clause_b.text.split()) < 8:
+        if feat_a["word_count"] < 8 or feat_b["word_count"] < 8:
             return None
-        # Extract potential authority entities
-        entities_a = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', clause_a.text)
-        entities_b = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', clause_b.text)
-        
+        entities_a = feat_a["cap_entities"]
+        entities_b = feat_b["cap_entities"]
+
         # Check for different entities with similar context
         if entities_a and entities_b and set(entities_a) != set(entities_b):
             # Require near-identical sentence structure
-            overlap = _content_overlap(clause_a.text, clause_b.text)
-            
             if overlap > 0.55:
                 return {
-                    "clause_a": clause_a,
-                    "clause_b": clause_b,
+                    "clause_a": feat_a["clause"],
+                    "clause_b": feat_b["clause"],
                     "type": "authority",
                     "severity": "medium",
                     "description": f"Authority mismatch: {entities_a} vs {entities_b}",
                     "confidence": 0.7
                 }
     return None
+
+
+def check_numeric_mismatch(clause_a, clause_b) -> Dict:
+    """Detect numeric contradictions between structurally similar sentences."""
+    feat_a, feat_b = _clause_features(clause_a), _clause_features(clause_b)
+    return _numeric_mismatch(feat_a, feat_b, _overlap_ratio(feat_a["content_words"], feat_b["content_words"]))
+
+
+def check_modal_mismatch(clause_a, clause_b) -> Dict:
+    """Detect modal contradictions (must vs may, required vs optional)."""
+    feat_a, feat_b = _clause_features(clause_a), _clause_features(clause_b)
+    return _modal_mismatch(feat_a, feat_b, _overlap_ratio(feat_a["content_words"], feat_b["content_words"]))
+
+
+def check_authority_mismatch(clause_a, clause_b) -> Dict:
+    """Detect authority/responsibility contradictions."""
+    feat_a, feat_b = _clause_features(clause_a), _clause_features(clause_b)
+    return _authority_mismatch(feat_a, feat_b, _overlap_ratio(feat_a["content_words"], feat_b["content_words"]))
@@ -1,6 +1,10 @@
 """Supabase Storage service for uploading and managing files."""
+import asyncio
+import atexit
 import logging
 import threading
+
+import httpx
 from supabase import create_client, Client
 
 from config import settings
@@ -10,6 +14,10 @@ logger = logging.getLogger(__name__)
 _client: Client | None = None
 _client_lock = threading.Lock()
 
+# from_() builds a fresh bucket API object per call; cache them per bucket so
+# every upload/url/delete reuses the same handle (and its HTTP session)
+_bucket_handles: dict = {}
+
 
 def _get_client() -> Client:
     """Lazy-initialize the Supabase client (thread-safe)."""
@@ -26,6 +34,20 @@ def _get_client() -> Client:
     return _client
 
 
+def _get_bucket(bucket: str | None):
+    """Return the cached storage handle for a bucket (default from settings)."""
+    bucket_name = bucket or settings.SUPABASE_BUCKET
+    handle = _bucket_handles.get(bucket_name)
+    if handle is None:
+        client = _get_client()  # outside the lock: _get_client takes it too
+        with _client_lock:
+            handle = _bucket_handles.get(bucket_name)
+            if handle is None:
+                handle = client.storage.from_(bucket_name)
+                _bucket_handles[bucket_name] = handle
+    return handle
+
+
 def upload_file(
     file_bytes: bytes,
     file_path: str,
@@ -44,10 +66,8 @@ def upload_file(
     Returns:
         The storage path of the uploaded file.
     """
-    client = _get_client()
     bucket_name = bucket or settings.SUPABASE_BUCKET
-
-    client.storage.from_(bucket_name).upload(
+    _get_bucket(bucket).upload(
         path=file_path,
         file=file_bytes,
         file_options={"content-type": content_type},
@@ -57,21 +77,123 @@ def upload_file(
     return file_path
 
 
+def upload_fileobj(
+    fileobj,
+    file_path: str,
+    content_type: str = "application/octet-stream",
+    bucket: str | None = None,
+) -> str:
+    """
+    Upload a file-like object to Supabase Storage without buffering it in RAM.
+
+    Args:
+        fileobj: Binary file-like object positioned at the start of the data
+                 (e.g. UploadFile.file, a SpooledTemporaryFile).
+        file_path: Path inside the bucket, e.g. "user_1/abc123.pdf".
+        content_type: MIME type of the file.
+        bucket: Override bucket name (defaults to settings.SUPABASE_BUCKET).
+
+    Returns:
+        The storage path of the uploaded file.
+    """
+    bucket_name = bucket or settings.SUPABASE_BUCKET
+    _get_bucket(bucket).upload(
+        path=file_path,
+        file=fileobj,
+        file_options={"content-type": content_type},
+    )
+
+    logger.info(f"Uploaded {file_path} to bucket '{bucket_name}' (streamed)")
+    return file_path
+
+
+async def upload_files_many(
+    items: list[tuple[bytes, str, str]],
+    concurrency: int = 8,
+    bucket: str | None = None,
+) -> list[str]:
+    """
+    Upload many files to Supabase Storage concurrently.
+
+    Uploads are network-bound, so overlapping requests (bounded by
+    `concurrency`) collapses N round-trips into roughly N/concurrency.
+    Posts straight to the storage REST endpoint — the same call the SDK
+    makes — over one keep-alive connection pool.
+
+    Args:
+        items: List of (file_bytes, file_path, content_type) tuples.
+        concurrency: Maximum number of in-flight uploads.
+        bucket: Override bucket name (defaults to settings.SUPABASE_BUCKET).
+
+    Returns:
+        The storage paths of the uploaded files, in input order.
+    """
+    if not items:
+        return []
+    if not settings.SUPABASE_URL or not settings.SUPABASE_SERVICE_KEY:
+        raise RuntimeError(
+            "SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in .env"
+        )
+
+    bucket_name = bucket or settings.SUPABASE_BUCKET
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {
+        "Authorization": f"Bearer {settings.SUPABASE_SERVICE_KEY}",
+        "apikey": settings.SUPABASE_SERVICE_KEY,
+    }
+
+    async with httpx.AsyncClient(
+        base_url=f"{settings.SUPABASE_URL}/storage/v1",
+        headers=headers,
+        timeout=60.0,
+    ) as client:
+
+        async def _upload_one(file_bytes: bytes, file_path: str, content_type: str) -> str:
+            async with semaphore:
+                response = await client.post(
+                    f"/object/{bucket_name}/{file_path}",
+                    content=file_bytes,
+                    headers={"Content-Type": content_type},
+                )
+                response.raise_for_status()
+                return file_path
+
+        paths = await asyncio.gather(*(_upload_one(*item) for item in items))
+
+    logger.info(f"Uploaded {len(paths)} files to bucket '{bucket_name}' (concurrency={concurrency})")
+    return list(paths)
+
+
 def get_public_url(file_path: str, bucket: str | None = None) -> str:
     """Get the public URL for a file in Supabase Storage."""
-    client = _get_client()
-    bucket_name = bucket or settings.SUPABASE_BUCKET
-    res = client.storage.from_(bucket_name).get_public_url(file_path)
+    res = _get_bucket(bucket).get_public_url(file_path)
     return res
 
 
+# One keep-alive client for all worker file downloads — pooled connections
+# (and HTTP/2 multiplexing when the endpoint speaks it) instead of a fresh
+# TCP+TLS handshake per document. httpx.Client is thread-safe to share.
+_download_client = httpx.Client(
+    http2=True,
+    timeout=60,
+    limits=httpx.Limits(max_keepalive_connections=32),
+)
+atexit.register(_download_client.close)
+
+
+def download_file(signed_url: str) -> bytes:
+    """Download a file over the shared keep-alive client."""
+    response = _download_client.get(signed_url)
+    response.raise_for_status()
+    return response.content
+
+
 def get_signed_url(
     file_path: str, expires_in: int = 3600, bucket: str | None = None
 ) -> str:
     """Get a signed (temporary) URL for a file in Supabase Storage."""
-    client = _get_client()
     bucket_name = bucket or settings.SUPABASE_BUCKET
-    res = client.storage.from_(bucket_name).create_signed_url(file_path, expires_in)
+    res = _get_bucket(bucket).create_signed_url(file_path, expires_in)
     signed_url = res.get("signedURL", "")
     if not signed_url:
         raise RuntimeError(
@@ -82,7 +204,6 @@ def get_signed_url(
 
 def delete_file(file_path: str, bucket: str | None = None) -> None:
     """Delete a file from Supabase Storage."""
-    client = _get_client()
     bucket_name = bucket or settings.SUPABASE_BUCKET
-    client.storage.from_(bucket_name).remove([file_path])
+    _get_bucket(bucket).remove([file_path])
     logger.info(f"Deleted {file_path} from bucket '{bucket_name}'")
@@ -0,0 +1,61 @@
+"""
+Regression tests for clause segmentation.
+
+Run from backend/ with:  python -m pytest tests/ -q
+"""
+from utils.clause_segmenter import segment_clauses, segment_clauses_stream
+
+BODY_A = (
+    "This Agreement shall commence on the first day of January and "
+    "shall remain in force for a period of five years."
+)
+BODY_B = (
+    "The supplier shall deliver monthly progress reports to the steering "
+    "committee within ten business days of month end."
+)
+
+
+def test_numbered_heading_at_text_start():
+    out = segment_clauses("1. Introduction\n" + BODY_A)
+    assert out == [BODY_A]
+
+
+def test_numbered_heading_after_leading_newline():
+    # The bullet branch must not eat the newline anchoring the heading
+    # branch: with "\n1. Introduction" only the "1. " marker was consumed
+    # and "Introduction" leaked into the following sentence.
+    out = segment_clauses("\n1. Introduction\n" + BODY_A)
+    assert out == [BODY_A]
+
+
+def test_skip_section_at_chunk_start_is_dropped():
+    # A skip-section heading preceded by a newline must still be
+    # recognized, so its body is dropped until the next heading.
+    text = (
+        "\n1. Table of Contents\n"
+        "The introduction section describes the background and is found early.\n"
+        "2. Scope\n" + BODY_A
+    )
+    out = segment_clauses(text)
+    assert out == [BODY_A]
+
+
+def test_stream_chunks_starting_with_whitespace():
+    # Page chunks routinely start with whitespace; headings there must
+    # still be detected, and skip state must carry across chunks.
+    pages = [
+        "\n1. Introduction\n" + BODY_A,
+        "\n2. Definitions\n" + BODY_B,  # "definitions" is a skip section
+    ]
+    out = segment_clauses_stream(pages)
+    assert out == [BODY_A]
+
+
+def test_bullets_still_split():
+    text = (
+        "The parties agree to the following obligations as binding terms:\n"
+        "• " + BODY_A + "\n"
+        "• " + BODY_B + "\n"
+    )
+    out = segment_clauses(text)
+    assert BODY_A in out and BODY_B in out
@@ -15,13 +15,45 @@ Pipeline:
 
 import re
 import logging
+from collections import defaultdict, deque
+from functools import lru_cache
 from typing import List
 
+try:
+    import ahocorasick  # single-pass multi-literal matching
+except ImportError:
+    ahocorasick = None
+
+try:
+    import re2  # google-re2: linear-time DFA engine, no backtracking
+except ImportError:
+    re2 = None
+
 logger = logging.getLogger(__name__)
 
+
+def _compile_linear(pattern: str, flags: int = 0):
+    """Compile the big keyword alternations with RE2 when available.
+
+    RE2 runs in linear time regardless of input, removing any
+    catastrophic-backtracking risk from the many overlapping-prefix
+    alternations below. Falls back to the stdlib engine — and RE2 itself
+    rejects constructs it doesn't support (lookaround), so those patterns
+    must stay on `re`.
+    """
+    if re2 is not None:
+        try:
+            return re2.compile(pattern, flags)
+        except Exception:
+            pass
+    return re.compile(pattern, flags)
+
+
 # ── Pre-compiled patterns for noise detection ──
-_RE_PAGE_NUMBER     = re.compile(r'^(?:page\s+)?\d+(?:\s*(?:of|/)\s*\d+)?$', re.IGNORECASE)
-_RE_URL             = re.compile(r'^https?://', re.IGNORECASE)
+# These run against pre-lowercased input from _is_noise, so they are
+# case-sensitive — the engine skips per-character case folding.
+_RE_PAGE_NUMBER     = re.compile(r'^(?:page\s+)?\d+(?:\s*(?:of|/)\s*\d+)?$')
+_RE_URL             = re.compile(r'^https?://')
 _RE_TOC_ENTRY       = re.compile(r'\.{3,}\s*\d+$')
 _RE_DATE_ONLY       = re.compile(
     r'^(?:date[:\s]*)?'
@@ -29,20 +61,17 @@ _RE_DATE_ONLY       = re.compile(
     r'(?:january|february|march|april|may|june|july|august|september|october|november|december)'
     r'\s+\d{1,2},?\s*\d{2,4}|'
     r'\d{1,2}\s+(?:january|february|march|april|may|june|july|august|september|october|november|december)'
-    r',?\s*\d{2,4})$',
-    re.IGNORECASE,
+    r',?\s*\d{2,4})$'
 )
 _RE_NUMERIC_ROW     = re.compile(
     r'^[\d\s\.\,\$\%\€\£\(\)\-\+\/\|:]+$'
 )
 _RE_SIGNATURE_LINE  = re.compile(
     r'^(?:(?:signed|signature|authorized|approved|witnessed|notarized)'
-    r'(?:\s+by)?[:\s]|_{3,}|\.{3,}\s*$)',
-    re.IGNORECASE,
+    r'(?:\s+by)?[:\s]|_{3,}|\.{3,}\s*$)'
 )
 _RE_COPYRIGHT       = re.compile(
-    r'(?:©|\(c\)|copyright|all\s+rights\s+reserved|confidential\s+and\s+proprietary)',
-    re.IGNORECASE,
+    r'(?:©|\(c\)|copyright|all\s+rights\s+reserved|confidential\s+and\s+proprietary)'
 )
 _RE_HEADER_FOOTER   = re.compile(
     r'^(?:private\s+&?\s*confidential|draft|for\s+internal\s+use\s+only'
@@ -53,24 +82,21 @@ _RE_HEADER_FOOTER   = re.compile(
     r'|rev(?:ision)?[:\s\.]?\s*\d'
     r'|version[:\s\.]?\s*\d'
     r'|effective\s+date[:\s]'
-    r'|last\s+(?:updated|modified|revised)[:\s])',
-    re.IGNORECASE,
+    r'|last\s+(?:updated|modified|revised)[:\s])'
 )
-_RE_DISCLAIMER      = re.compile(
+_RE_DISCLAIMER      = _compile_linear(
     r'(?:this\s+document\s+is\s+(?:provided|furnished)\s+(?:as\s+is|for\s+information)'
     r'|(?:no|without)\s+(?:warranty|guarantee|representation)'
     r'|for\s+informational\s+purposes\s+only'
     r'|e\.?\s*&?\s*o\.?\s*e\.?'
-    r'|errors?\s+and\s+omissions?\s+excepted)',
-    re.IGNORECASE,
+    r'|errors?\s+and\s+omissions?\s+excepted)'
 )
 _RE_TABLE_HEADER    = re.compile(
     r'^(?:(?:sr\.?\s*no|s\.?\s*no|sl\.?\s*no|#|item|description|qty|quantity'
     r'|amount|total|subtotal|unit|rate|price|cost|value|balance'
-    r'|debit|credit|particulars|remarks?)\s*[\|\t,]){2,}',
-    re.IGNORECASE,
+    r'|debit|credit|particulars|remarks?)\s*[\|\t,]){2,}'
 )
-_RE_BOILERPLATE     = re.compile(
+_RE_BOILERPLATE     = _compile_linear(
     r'^(?:'
     r'this\s+(?:section|chapter|report|document|annex|appendix|part)\s+(?:describes|outlines|provides|presents|discusses|covers|deals\s+with|sets\s+out|contains|summarizes|explains|focuses|examines)'
     r'|for\s+the\s+purposes?\s+of\s+this\s+(?:document|report|agreement|policy|standard|guideline)'
@@ -80,61 +106,75 @@ _RE_BOILERPLATE     = re.compile(
     r'|in\s+accordance\s+with\s+(?:section|clause|article|annex|appendix)'
     r'|note[:\s]'
     r'|source[:\s]'
-    r')',
-    re.IGNORECASE,
+    r')'
 )
-_RE_CITATION        = re.compile(
+_RE_CITATION        = _compile_linear(
     r'(?:'
     r'\[\d+\]'
     r'|\((?:(?:19|20)\d{2}[a-z]?(?:;\s*)?)+\)'
     r'|\b(?:ibid|op\.?\s*cit|et\s+al)\.?'
-    r'|^\d+\.\s+[A-Z][^.]{5,60}\.\s+(?:(?:19|20)\d{2})'
-    r')',
-    re.IGNORECASE,
+    # [a-z]: input is pre-lowered (was [A-Z] under IGNORECASE — same set)
+    r'|^\d+\.\s+[a-z][^.]{5,60}\.\s+(?:(?:19|20)\d{2})'
+    r')'
 )
 _RE_LIST_INTRO      = re.compile(
-    r'^.*(?:as\s+follows|the\s+following|includes?\s+(?:the\s+following|but\s+not\s+limited\s+to)|such\s+as|for\s+example|e\.g\.|i\.e\.)[:\s]*$',
-    re.IGNORECASE,
+    r'^.*(?:as\s+follows|the\s+following|includes?\s+(?:the\s+following|but\s+not\s+limited\s+to)|such\s+as|for\s+example|e\.g\.|i\.e\.)[:\s]*$'
 )
 _RE_CHAPTER_HEADING = re.compile(
     r'^(?:'
     r'(?:chapter|part|module|unit|volume|phase|stage|annex|appendix)\s*[-–—:]?\s*\d+'
     r'|\d+\.\s*(?:introduction|conclusion|summary|overview|background|methodology|results|discussion|analysis|objectives?|scope|limitations?|recommendations?)'
     r'|(?:abstract|acknowledgements?|preface|foreword|executive\s+summary|list\s+of\s+(?:figures|tables|abbreviations))'
-    r')\s*$',
-    re.IGNORECASE,
+    r')\s*$'
 )
-_RE_RUNNING_HEADER  = re.compile(
+_RE_RUNNING_HEADER  = _compile_linear(
     r'(?:'
     r'\|\s*\d{1,4}\s'          # "Company | 3 Title"
     r'|^\d{1,4}\s+[A-Z]'       # "3 Forecasting Crypto..."
     r'|[A-Z][^|]{5,}\|\s*\d'   # "Title Text | 7"
     r')',
 )
-_RE_HAS_VERB        = re.compile(
-    r'\b(?:'
-    r'is|are|was|were|be|been|being|am'
-    r'|have|has|had|having'
-    r'|do|does|did|doing'
-    r'|will|would|shall|should|may|might|can|could|must'
-    r'|include[sd]?|contain[sd]?|consist[sd]?|comprise[sd]?'
-    r'|provide[sd]?|require[sd]?|specify|specifies|specified'
-    r'|state[sd]?|define[sd]?|describe[sd]?|indicate[sd]?'
-    r'|allow[sd]?|permit[sd]?|prohibit[sd]?|restrict[sd]?'
-    r'|ensure[sd]?|maintain[sd]?|establish(es|ed)?'
-    r'|determine[sd]?|affect[sd]?|impact[sd]?|influence[sd]?'
-    r'|increase[sd]?|decrease[sd]?|reduce[sd]?|improve[sd]?'
-    r'|exceed[sd]?|remain[sd]?|occur[sd]?|exist[sd]?'
-    r'|operate[sd]?|function[sd]?|perform[sd]?'
-    r'|submit[sd]?|report[sd]?|recommend[sd]?'
-    r'|manage[sd]?|monitor[sd]?|assess(es|ed)?'
-    r'|predict[sd]?|estimate[sd]?|measure[sd]?'
-    r'|implement(ed|s)?|apply|applies|applied'
-    r'|use[sd]?|using|employ[sd]?'
-    r'|demonstrate[sd]?|show[sd]?|suggest[sd]?'
-    r'|result[sd]?|cause[sd]?|lead[sd]?|contribute[sd]?'
-    r')\b',
-    re.IGNORECASE,
+# ── Pre-compiled patterns for splitting and cleanup ──
+_RE_SECTION_HEADING = re.compile(
+    r'(?:^|\n)((?:\d+\.)+\s+[^\n]+|(?:Article|Section|Chapter|Part)\s+\d+[:\.]?\s+[^\n]+)',
+    re.MULTILINE | re.IGNORECASE,
+)
+# Fused delimiter scan: one finditer pass finds section headings, bullet
+# markers and sentence boundaries together; candidate sentences are the
+# slices between consecutive matches. IGNORECASE is scoped inline to the
+# heading branch so the (?=[A-Z]) sentence lookahead stays case-sensitive.
+_RE_SPLIT_ALL       = re.compile(
+    # Line starts use (?<=\n) rather than consuming the \n, so a sentence
+    # boundary swallowing trailing newlines can't hide the next heading/bullet
+    r'(?:^|(?<=\n))(?i:(?:\d+\.)+\s+|(?:Article|Section|Chapter|Part)\s+\d+[:\.]?\s+)(?P<heading>[^\n]+)'
+    # Bullet indent is [ \t]* — never \s*, which would swallow the newline
+    # that anchors the heading branch on the next line and win the
+    # leftmost-match race against it for "\n1. Heading" inputs
+    r'|(?:^|(?<=\n))[ \t]*(?:[•\-\*]|\d+[\.\)])\s+'         # bullet marker
+    r'|(?<=[.;?!])\s*(?:\n|\s{2,})|(?<=[.?!])\s+(?=[A-Z])'  # sentence boundary
+)
+_RE_NUM_PREFIX      = re.compile(r'^(?:\d+\.)+\s*')
+_RE_ALPHA_PAREN     = re.compile(r'^[a-z]\)\s+', re.IGNORECASE)
+_RE_ROMAN_PREFIX    = re.compile(r'^(?:i{1,3}|iv|vi{0,3}|ix|x{1,3})[\.\)]\s+', re.IGNORECASE)
+_RE_SENT_START      = re.compile(r'^[A-Z0-9"\'\(]')
+_RE_WS              = re.compile(r'\s+')
+# Fed pre-lowered input from the noise union — case-sensitive on purpose
+_RE_CONTACT_LINE    = re.compile(r'^(?:email|e-mail|tel|phone|fax|mobile|contact)[:\s]')
+_RE_ZIP_END         = re.compile(r'\b\d{5,6}\b$')
+
+# Fused alternation of every unconditional anchored noise pattern — one
+# regex-engine entry per sentence instead of ten. Only patterns without
+# word-count side conditions belong here; _is_noise returns a plain boolean,
+# so check order doesn't matter. All members expect pre-lowered input.
+_RE_NOISE_MATCH_UNION = _compile_linear(
+    '|'.join(
+        f'(?:{p.pattern})'
+        for p in (
+            _RE_PAGE_NUMBER, _RE_URL, _RE_DATE_ONLY, _RE_NUMERIC_ROW,
+            _RE_SIGNATURE_LINE, _RE_HEADER_FOOTER, _RE_TABLE_HEADER,
+            _RE_LIST_INTRO, _RE_CHAPTER_HEADING, _RE_CONTACT_LINE,
+        )
+    )
 )
 
 # Words that mark boilerplate sections we should skip entirely
@@ -145,8 +185,67 @@ _SKIP_SECTION_TITLES = {
     'signature page', 'execution page', 'witness',
 }
 
+# ── Verb lexicon ──
+# Plain forms are listed as-is; each base in _VERB_BASES_SD is expanded to
+# base/base+s/base+d. A sentence "makes a claim" if any of its tokens is in
+# _VERB_WORDS — set membership per token, no regex alternation.
+_VERB_BASES_SD = (
+    'include', 'contain', 'consist', 'comprise', 'provide', 'require',
+    'state', 'define', 'describe', 'indicate', 'allow', 'permit',
+    'prohibit', 'restrict', 'ensure', 'maintain', 'determine', 'affect',
+    'impact', 'influence', 'increase', 'decrease', 'reduce', 'improve',
+    'exceed', 'remain', 'occur', 'exist', 'operate', 'function', 'perform',
+    'submit', 'report', 'recommend', 'manage', 'monitor', 'predict',
+    'estimate', 'measure', 'use', 'employ', 'demonstrate', 'show',
+    'suggest', 'result', 'cause', 'lead', 'contribute',
+)
+_VERB_PLAIN = (
+    'is', 'are', 'was', 'were', 'be', 'been', 'being', 'am',
+    'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing',
+    'will', 'would', 'shall', 'should', 'may', 'might', 'can', 'could', 'must',
+    'specify', 'specifies', 'specified',
+    'establish', 'establishes', 'established',
+    'assess', 'assesses', 'assessed',
+    'implement', 'implemented', 'implements',
+    'apply', 'applies', 'applied', 'using',
+)
+_VERB_WORDS = frozenset(_VERB_PLAIN) | {
+    base + suffix for base in _VERB_BASES_SD for suffix in ('', 's', 'd')
+}
+# Punctuation stripped from token edges before the lexicon lookup
+_TOKEN_EDGE_PUNCT = '.,;:!?()\'"'
+
+
+def _build_automaton(words):
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, len(word))
+    automaton.make_automaton()
+    return automaton
+
+
+_SKIP_AC = _build_automaton(_SKIP_SECTION_TITLES) if ahocorasick else None
+
+
+def _has_verb(words: List[str]) -> bool:
+    """True if any token (lowercased, edge punctuation stripped) is a verb.
+
+    isdisjoint short-circuits on the first hit, so this is one hash lookup
+    per token until a verb is found.
+    """
+    return not _VERB_WORDS.isdisjoint(
+        w.lower().strip(_TOKEN_EDGE_PUNCT) for w in words
+    )
+
+
+def _is_skip_heading(heading: str) -> bool:
+    """True if a (lowercased) heading names a section to skip entirely."""
+    if _SKIP_AC is None:
+        return any(skip in heading for skip in _SKIP_SECTION_TITLES)
+    return next(_SKIP_AC.iter(heading), None) is not None
+
 
-def segment_clauses(raw_text: str) -> List[str]:
+def segment_clauses(raw_text: str, dedup_window: int = 2048) -> List[str]:
     """
     Extract complete, assertive sentences from document text.
 
@@ -162,108 +261,173 @@ def segment_clauses(raw_text: str) -> List[str]:
     if not raw_text or not raw_text.strip():
         return []
 
-    sentences: List[str] = []
-    in_skip_section = False
+    # Near-duplicate collapse over the lazily produced candidates
+    unique = _deduplicate(_iter_sentences(raw_text), dedup_window)
 
-    # ── 1. Split by major section headings ──
-    section_pattern = r'(?:^|\n)(?:(?:\d+\.)+\s+|(?:Article|Section|Chapter|Part)\s+\d+[:\.]?\s+)([^\n]+)'
-    sections = re.split(section_pattern, raw_text, flags=re.MULTILINE | re.IGNORECASE)
-
-    for i, chunk in enumerate(sections):
-        if not chunk or not chunk.strip():
-            continue
+    logger.info(f"Segmented {len(unique)} sentences from {len(raw_text)} characters")
+    return unique
 
-        # Odd indices are captured heading text
-        if i % 2 == 1:
-            heading = chunk.strip().lower()
-            in_skip_section = any(skip in heading for skip in _SKIP_SECTION_TITLES)
-            continue
 
-        if in_skip_section:
-            continue
+def segment_clauses_stream(chunks, dedup_window: int = 2048) -> List[str]:
+    """
+    Segment an iterable of text chunks (e.g. PDF pages) into sentences.
 
-        # ── 2. Split into bullet sub-chunks ──
-        bullet_pattern = r'(?:^|\n)\s*(?:[•\-\*]|\d+[\.\)])\s+'
-        bullet_chunks = re.split(bullet_pattern, chunk)
-
-        for bc in bullet_chunks:
-            if not bc or not bc.strip():
-                continue
-
-            # ── 3. Split by sentence boundaries ──
-            #   . or ; or ? or ! followed by whitespace + uppercase letter
-            #   or period/semicolon + newline / double-space
-            sent_pattern = (
-                r'(?<=[.;?!])\s*(?:\n|\s{2,})'      # punc + newline / 2+ spaces
-                r'|(?<=[.?!])\s+(?=[A-Z])'           # punc + space + uppercase
-            )
-            raw_sents = re.split(sent_pattern, bc)
-
-            for raw in raw_sents:
-                cleaned = _clean_sentence(raw)
-                if not cleaned:
-                    continue
-                if _is_noise(cleaned):
-                    continue
-                if not _is_sentence(cleaned):
-                    continue
-                sentences.append(cleaned)
-
-    # ── 4. Near-duplicate collapse ──
-    unique = _deduplicate(sentences)
+    Streaming counterpart to segment_clauses for use with
+    extract_and_clean_pages: each chunk is segmented as it arrives and the
+    full document string is never assembled. Skip-section state carries
+    across chunk boundaries so a skipped section spanning pages stays
+    skipped, and deduplication runs across the whole stream.
 
-    logger.info(f"Segmented {len(unique)} sentences from {len(raw_text)} characters")
+    Returns:
+        Ordered list of unique sentence strings.
+    """
+    def _iter_chunks():
+        state = [False]
+        for chunk in chunks:
+            if chunk and chunk.strip():
+                yield from _iter_sentences(chunk, state)
+
+    unique = _deduplicate(_iter_chunks(), dedup_window)
+    logger.info(f"Segmented {len(unique)} sentences from streamed chunks")
     return unique
 
 
+def _iter_sentences(raw_text: str, _skip_state: list = None):
+    """Yield cleaned, validated candidate sentences in document order.
+
+    One finditer pass over the text finds every section-heading, bullet and
+    sentence delimiter; the slices between consecutive matches are the same
+    candidates the old section→bullet→sentence re.split cascade produced,
+    without re-walking the text three times or materializing chunk lists.
+
+    _skip_state is a one-element list used by segment_clauses_stream to
+    carry the in-skip-section flag across chunk boundaries.
+    """
+    in_skip_section = _skip_state[0] if _skip_state else False
+    pos = 0
+
+    def _candidate(start: int, end: int):
+        if in_skip_section or start >= end:
+            return None
+        cleaned = _clean_sentence(raw_text[start:end])
+        if not cleaned or not _is_valid_sentence(cleaned):
+            return None
+        return cleaned
+
+    for m in _RE_SPLIT_ALL.finditer(raw_text):
+        sent = _candidate(pos, m.start())
+        if sent:
+            yield sent
+        pos = m.end()
+
+        heading = m.group('heading')
+        if heading is not None:
+            in_skip_section = _is_skip_heading(heading.strip().lower())
+            if _skip_state is not None:
+                _skip_state[0] = in_skip_section
+
+    sent = _candidate(pos, len(raw_text))
+    if sent:
+        yield sent
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 #  Sentence validation
 # ─────────────────────────────────────────────────────────────────────────────
 
+@lru_cache(maxsize=4096)
 def _clean_sentence(raw: str) -> str:
-    """Trim leading numbering, bullet markers, and excess whitespace."""
+    """Trim leading numbering, bullet markers, and excess whitespace.
+
+    Memoized: repeated disclaimers and footer fragments that survive
+    header cleanup re-enter on every page, and cleaning is pure.
+    """
     s = raw.strip()
     # Strip leading "1.2.3 " or "a) " or "iv. "
-    s = re.sub(r'^(?:\d+\.)+\s*', '', s)
-    s = re.sub(r'^[a-z]\)\s+', '', s, flags=re.IGNORECASE)
-    s = re.sub(r'^(?:i{1,3}|iv|vi{0,3}|ix|x{1,3})[\.\)]\s+', '', s, flags=re.IGNORECASE)
+    s = _RE_NUM_PREFIX.sub('', s)
+    s = _RE_ALPHA_PAREN.sub('', s)
+    s = _RE_ROMAN_PREFIX.sub('', s)
     # Collapse whitespace
     s = ' '.join(s.split())
     return s
 
 
-def _is_sentence(text: str) -> bool:
+@lru_cache(maxsize=4096)
+def _is_valid_sentence(cleaned: str) -> bool:
+    """Memoized noise + structure verdict for a cleaned candidate.
+
+    Both checks are pure over the string, so repeated fragments cost one
+    dict lookup after their first classification. The candidate is
+    tokenized once here and the list shared by both checks.
+    """
+    words = cleaned.split()
+    return not _is_noise(cleaned, words) and _is_sentence(cleaned, words)
+
+
+def _is_sentence(text: str, words: List[str] = None) -> bool:
     """
     Return True only if *text* looks like a complete, assertive sentence.
 
     Requirements:
       1. At least 8 words
-      2. Contains a verb (checked via _RE_HAS_VERB)
+      2. Contains a verb (checked against _VERB_WORDS)
       3. Starts with an uppercase letter or a digit
       4. Not purely a heading / title (all caps + short)
     """
-    words = text.split()
+    if words is None:
+        words = text.split()
     if len(words) < 8:
         return False
 
-    # Must contain a verb → makes a claim
-    if not _RE_HAS_VERB.search(text):
+    # Must contain a verb → makes a claim (reuses the split from above)
+    if not _has_verb(words):
         return False
 
     # Must start with uppercase letter, digit, or opening quote
-    if not re.match(r'^[A-Z0-9"\'\(]', text):
+    if not _RE_SENT_START.match(text):
         return False
 
     return True
 
 
-def _deduplicate(sentences: List[str]) -> List[str]:
+# Word interning for _deduplicate: content words are mapped to small ints so
+# the hot Jaccard set intersection runs on integers (identity hashing, no
+# string compares) instead of re-hashing the same word strings per pair.
+# Grows with the vocabulary of words actually seen; document vocabularies
+# are small enough that this never needs eviction.
+_word_ids: dict = {}
+
+
+def _intern_word(word: str) -> int:
+    wid = _word_ids.get(word)
+    if wid is None:
+        wid = len(_word_ids)
+        _word_ids[word] = wid
+    return wid
+
+
+def _deduplicate(sentences: List[str], dedup_window: int = 2048) -> List[str]:
     """
     Remove exact duplicates and near-duplicates (≥85 % word overlap).
     Preserves document order — keeps the first occurrence.
+
+    Near-dup history is bounded to the most recent *dedup_window* kept
+    sentences: repeated fragments have temporal locality (headers and
+    disclaimers recur within a few pages), so distant history rarely
+    matches and bounding it caps both memory and per-sentence cost on
+    very long documents. Pass None to keep the full history.
     """
-    seen_norm: set = set()
-    seen_word_sets: List[set] = []
+    # Exact dups tracked by hash only — membership is all we need, and not
+    # retaining the normalized strings keeps the set small. A 64-bit
+    # collision mis-dropping a sentence is negligible at document scale.
+    seen_norm_hashes: set = set()
+    seen_word_sets: dict = {}   # kept index -> content-word id set
+    kept_order: deque = deque()  # kept indices, oldest first
+    next_idx = 0
+    # Inverted index: content word id -> kept indices. 85 % overlap needs
+    # at least one shared word, so checking only sentences pulled from the
+    # buckets is exact while skipping the full linear scan.
+    word_buckets: dict = defaultdict(list)
     unique: List[str] = []
 
     _stop = frozenset({
@@ -274,19 +438,25 @@ def _deduplicate(sentences: List[str]) -> List[str]:
     })
 
     for sent in sentences:
-        norm = ' '.join(sent.lower().split())
+        norm = _RE_WS.sub(' ', sent.lower()).strip()
 
         # Exact dup
-        if norm in seen_norm:
+        norm_hash = hash(norm)
+        if norm_hash in seen_norm_hashes:
             continue
-        seen_norm.add(norm)
+        seen_norm_hashes.add(norm_hash)
 
         # Near-dup: ≥85 % content-word overlap with any already-kept sentence
-        cw = {w for w in norm.split() if w not in _stop and len(w) > 2}
+        cw = frozenset(
+            _intern_word(w) for w in norm.split() if w not in _stop and len(w) > 2
+        )
+        candidates: set = set()
+        for w in cw:
+            candidates.update(word_buckets[w])
+
         is_near_dup = False
-        for prev in seen_word_sets:
-            if not cw or not prev:
-                continue
+        for idx in candidates:
+            prev = seen_word_sets[idx]
             overlap = len(cw & prev) / max(len(cw), len(prev))
             if overlap >= 0.85:
                 is_near_dup = True
@@ -294,93 +464,83 @@ def _deduplicate(sentences: List[str]) -> List[str]:
         if is_near_dup:
             continue
 
-        seen_word_sets.append(cw)
+        kept_idx = next_idx
+        next_idx += 1
+        seen_word_sets[kept_idx] = cw
+        kept_order.append(kept_idx)
+        for w in cw:
+            word_buckets[w].append(kept_idx)
         unique.append(sent)
 
+        if dedup_window is not None and len(kept_order) > dedup_window:
+            evicted = kept_order.popleft()
+            # Evicted indices are always the oldest, so they sit at the
+            # front of every bucket they appear in
+            for w in seen_word_sets.pop(evicted):
+                word_buckets[w].pop(0)
+            logger.debug(f"Dedup window full ({dedup_window}); evicted oldest entry")
+
     return unique
 
 
-def _is_noise(text: str) -> bool:
+def _is_noise(text: str, words: List[str] = None) -> bool:
     """
     Return True for text that should never be treated as a sentence for
     contradiction detection — headers, footers, data rows, boilerplate, etc.
     """
     stripped = text.strip()
-    words = stripped.split()
+    num_words = len(words) if words is not None else len(stripped.split())
 
     # ── Length checks ──
-    if len(words) < 6:
-        return True
-
-    # ── Pattern checks ──
-    if _RE_PAGE_NUMBER.match(stripped):
-        return True
-
-    if _RE_URL.match(stripped):
+    if num_words < 6:
         return True
 
-    if _RE_TOC_ENTRY.search(stripped):
-        return True
-
-    if _RE_DATE_ONLY.match(stripped):
-        return True
+    # ── Cheap character-statistics checks first: on noise-heavy input
+    # (scanned/tabular PDFs) these alone reject most candidates, so the
+    # regex battery below never runs for them ──
 
-    if _RE_NUMERIC_ROW.match(stripped):
-        return True
-
-    if _RE_SIGNATURE_LINE.match(stripped):
-        return True
-
-    if _RE_COPYRIGHT.search(stripped) and len(words) < 20:
-        return True
-
-    if _RE_HEADER_FOOTER.match(stripped):
-        return True
-
-    if _RE_DISCLAIMER.search(stripped) and len(words) < 30:
-        return True
-
-    if _RE_TABLE_HEADER.match(stripped):
-        return True
-
-    # ── Report boilerplate / definitional preamble ──
-    if _RE_BOILERPLATE.match(stripped) and len(words) < 25:
-        return True
-
-    # ── Citations / references ──
-    if _RE_CITATION.search(stripped) and len(words) < 20:
-        return True
-
-    # ── List introduction lines ("The following items:") ──
-    if _RE_LIST_INTRO.match(stripped):
-        return True
-
-    # ── Chapter / section heading-only lines ──
-    if _RE_CHAPTER_HEADING.match(stripped):
-        return True
-
-    # ── Running headers ("Institution | 3 Report Title") ──
-    # If >40% of the text matches a running-header pattern and it's short, skip
-    if _RE_RUNNING_HEADER.search(stripped) and len(words) < 15:
+    # Mostly numbers/symbols (> 60% non-alpha chars → likely a data row)
+    alpha_chars = sum(1 for c in stripped if c.isalpha())
+    if len(stripped) > 0 and alpha_chars / len(stripped) < 0.35:
         return True
 
-    # ── All caps header ──
+    # All caps header
     if stripped.isupper() and len(stripped) < 60:
         return True
 
-    # ── Mostly numbers/symbols (> 60% non-alpha chars → likely a data row) ──
-    alpha_chars = sum(1 for c in stripped if c.isalpha())
-    if len(stripped) > 0 and alpha_chars / len(stripped) < 0.35:
-        return True
+    # Lowercase once: the keyword patterns below are case-sensitive so the
+    # regex engine skips per-character case folding
+    lowered = stripped.lower()
 
-    # ── Email / phone lines ──
-    if re.match(r'^(?:email|e-mail|tel|phone|fax|mobile|contact)[:\s]', stripped, re.IGNORECASE):
+    # ── Unconditional anchored patterns, fused into one alternation ──
+    # (page number, URL, date-only, numeric row, signature, header/footer,
+    # table header, list intro, chapter heading, email/phone line)
+    if _RE_NOISE_MATCH_UNION.match(lowered):
         return True
 
-    # ── Address-like lines (short, ends with zip code) ──
-    if re.search(r'\b\d{5,6}\b$', stripped) and len(words) < 8:
+    # TOC entries and trailing ZIP codes must end in a digit — one char
+    # check skips their regexes for the vast majority of real sentences,
+    # which end in punctuation
+    ends_in_digit = stripped[-1].isdigit()
+    if ends_in_digit and _RE_TOC_ENTRY.search(stripped):
         return True
 
+    # ── Word-count-conditional patterns: test the cheap count first so
+    # long sentences skip the regex entirely ──
+    if num_words < 30:
+        if ends_in_digit and num_words < 8 and _RE_ZIP_END.search(stripped):
+            return True
+        # Running headers ("Institution | 3 Report Title")
+        if num_words < 15 and _RE_RUNNING_HEADER.search(stripped):
+            return True
+        if num_words < 20 and (_RE_COPYRIGHT.search(lowered) or _RE_CITATION.search(lowered)):
+            return True
+        # Report boilerplate / definitional preamble
+        if num_words < 25 and _RE_BOILERPLATE.match(lowered):
+            return True
+        if _RE_DISCLAIMER.search(lowered):
+            return True
+
     return False
 
 
@@ -396,8 +556,7 @@ def extract_section_heading(text: str, position: int) -> str:
         Section heading string or empty string
     """
     before_text = text[:position]
-    section_pattern = r'(?:^|\n)((?:\d+\.)+\s+[^\n]+|(?:Article|Section|Chapter|Part)\s+\d+[:\.]?\s+[^\n]+)'
-    matches = list(re.finditer(section_pattern, before_text, re.MULTILINE | re.IGNORECASE))
+    matches = list(_RE_SECTION_HEADING.finditer(before_text))
 
     if matches:
         return matches[-1].group(1).strip()
@@ -4,15 +4,35 @@ Shared utility for building human-readable semantic contradiction descriptions.
 Used by both processing_worker.py (single-doc) and comparison_worker.py (multi-doc)
 to avoid code duplication.
 """
-from typing import List, Tuple
+from typing import Dict, List, Tuple
+
+import numpy as np
 
 from constants import STOP_WORDS
 
+# Deleting via translate() runs in C over the whole string — cheaper than
+# per-word strip() and it also catches interior punctuation
+_PUNCT_TBL = str.maketrans('', '', '.,;:!?\'"()')
+
+
+def build_pair_text_map(
+    nli_pairs: List[Tuple[str, str, str, str]],
+) -> Dict[Tuple[str, str], Tuple[str, str, str]]:
+    """Index NLI pair texts by unordered id pair for O(1) description lookups.
+
+    Built once per worker run; without it every contradiction description
+    re-scanned the full nli_pairs list.
+    """
+    return {
+        ((id_a, id_b) if id_a < id_b else (id_b, id_a)): (t_a, t_b, id_a)
+        for t_a, t_b, id_a, id_b in nli_pairs
+    }
+
 
 def build_semantic_description(
     clause_a_id: str,
     clause_b_id: str,
-    nli_pairs: List[Tuple[str, str, str, str]],
+    pair_text_map: Dict[Tuple[str, str], Tuple[str, str, str]],
     confidence_pct: float,
 ) -> str:
     """Build a human-readable description for a semantic contradiction.
@@ -23,33 +43,33 @@ def build_semantic_description(
     Args:
         clause_a_id: ID of the first clause.
         clause_b_id: ID of the second clause.
-        nli_pairs: List of (text_a, text_b, id_a, id_b) tuples from NLI batch.
+        pair_text_map: Output of build_pair_text_map for this run's NLI pairs.
         confidence_pct: Confidence percentage (0-100) for fallback description.
 
     Returns:
         Human-readable contradiction description string.
     """
-    # Find the matching pair texts
-    text_a = text_b = None
-    for t_a, t_b, id_a, id_b in nli_pairs:
-        if id_a == clause_a_id and id_b == clause_b_id:
-            text_a, text_b = t_a, t_b
-            break
-        if id_a == clause_b_id and id_b == clause_a_id:
-            text_a, text_b = t_b, t_a
-            break
+    key = (clause_a_id, clause_b_id) if clause_a_id < clause_b_id else (clause_b_id, clause_a_id)
+    entry = pair_text_map.get(key)
+    if entry is not None:
+        text_a, text_b, stored_a_id = entry
+        if stored_a_id != clause_a_id:
+            text_a, text_b = text_b, text_a
+    else:
+        text_a = text_b = None
 
     if not text_a or not text_b:
         return f"Semantic conflict detected (confidence: {confidence_pct:.0f}%)"
 
-    # Build cleaned word sets for diff computation
-    words_a_clean = [w.strip('.,;:!?\'"()').lower() for w in text_a.split()]
-    words_b_clean = [w.strip('.,;:!?\'"()').lower() for w in text_b.split()]
-    set_a = {w for w in words_a_clean if w not in STOP_WORDS and len(w) > 2}
-    set_b = {w for w in words_b_clean if w not in STOP_WORDS and len(w) > 2}
+    # Build cleaned word sets for diff computation — one pass per text,
+    # no intermediate cleaned lists
+    set_a = {w for raw in text_a.split()
+             if len(w := raw.translate(_PUNCT_TBL).lower()) > 2 and w not in STOP_WORDS}
+    set_b = {w for raw in text_b.split()
+             if len(w := raw.translate(_PUNCT_TBL).lower()) > 2 and w not in STOP_WORDS}
 
-    unique_a = set_a - set_b
-    unique_b = set_b - set_a
+    unique_a = set_a.difference(set_b)
+    unique_b = set_b.difference(set_a)
 
     span_a = _extract_best_span(text_a, unique_a)
     span_b = _extract_best_span(text_b, unique_b)
@@ -64,29 +84,26 @@ def _extract_best_span(original_text: str, unique_words: set, max_words: int = 1
     text and return the span with one word of leading context, preserving
     original casing and punctuation."""
     orig_words = original_text.split()
-    clean = [w.strip('.,;:!?\'"()').lower() for w in orig_words]
+    clean = [w.translate(_PUNCT_TBL).lower() for w in orig_words]
 
     # Mark each position that contains a unique content word
-    hits = [c in unique_words for c in clean]
-
-    # Find the longest contiguous run of True values
-    best_start = best_end = 0
-    cur_start = None
-    for i, hit in enumerate(hits):
-        if hit:
-            if cur_start is None:
-                cur_start = i
-            run_len = i - cur_start + 1
-            if run_len > (best_end - best_start):
-                best_start, best_end = cur_start, i + 1
-        else:
-            cur_start = None
-
-    if best_start == best_end:
-        # No contiguous run found — fall back to first few unique words in order
+    hits = np.fromiter((c in unique_words for c in clean), dtype=np.int8, count=len(clean))
+
+    # Longest run of hits via run-length encoding: edges of +1/-1 mark run
+    # starts and ends, so the scan is branchless instead of a token-by-token
+    # Python loop
+    edges = np.diff(np.concatenate(([0], hits, [0])))
+    starts = np.flatnonzero(edges == 1)
+
+    if starts.size == 0:
+        # No hit found — fall back to first few unique words in order
         fallback = [w for w, c in zip(orig_words, clean) if c in unique_words]
         return ' '.join(fallback[:max_words])
 
+    ends = np.flatnonzero(edges == -1)
+    best = int(np.argmax(ends - starts))  # first maximal run, like the old scan
+    best_start, best_end = int(starts[best]), int(ends[best])
+
     # Add one word of leading context for readability
     ctx_start = max(0, best_start - 1)
     span = orig_words[ctx_start:best_end]
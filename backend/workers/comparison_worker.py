@@ -10,34 +10,47 @@ Processes multiple documents and detects cross-document contradictions using:
 """
 import logging
 import uuid
-import json
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from typing import List, Dict, Tuple
 
-from db.session import SessionLocal
+from sqlalchemy import text
+from sqlalchemy.orm.attributes import set_committed_value
+
+from db.session import SessionLocal, autocommit_engine
 from models.document import Document
 from models.clause import Clause
 from models.contradiction import Contradiction
 from models.comparison import ComparisonSession
 from models.cross_contradiction import CrossContradiction
-from utils.text_extractor import extract_and_clean_text
-from utils.clause_segmenter import segment_clauses
-from utils.description_builder import build_semantic_description
-from services.supabase_storage import get_signed_url
-from services.embedding_service import generate_embeddings_batch
+from utils.text_extractor import extract_and_clean_pages
+from utils.clause_segmenter import segment_clauses_stream
+from utils.description_builder import build_pair_text_map, build_semantic_description
+from services.supabase_storage import download_file, get_signed_url
+from services.embedding_service import (
+    generate_embeddings_cached,
+    normalized_doc_matrix,
+    quantize_i8,
+)
 from services.rule_checker import check_contradictions_batch
-from services.nli_service import batch_nli_check
+from services.nli_service import batch_nli_check_cached
 from services.ner_service import extract_entities_batch
-from constants import STOP_WORDS
-from config import settings
-import httpx
+from services.dashboard_stats import refresh_dashboard_stats
+from constants import STOP_WORDS, WORD_RE
+
+try:
+    import simsimd  # SIMD (AVX-512/NEON) cosine kernels
+except ImportError:
+    simsimd = None
 
 logger = logging.getLogger(__name__)
 
 # ── Similarity threshold for cross-document clause matching ──
 CROSS_DOC_SIMILARITY_THRESHOLD = 0.75  # High — only near-paraphrase clauses across docs
 CONTRADICTION_CONFIDENCE_THRESHOLD = 0.75  # NLI confidence to store a contradiction
+TOP_K_PER_CLAUSE = 5  # cap on similarity matches emitted per clause (bounds NLI load)
+FULL_SIM_MAX_ROWS = 4096  # compute the full N×N similarity matrix up to this many clauses
 
 
 def process_multi_documents(comparison_id: str):
@@ -55,6 +68,7 @@ def process_multi_documents(comparison_id: str):
         6. Persist CrossContradiction rows
     """
     db = SessionLocal()
+    nli_executor = None  # background NLI pool; shut down in finally
     try:
         # ── 0. Load comparison session ──
         session = db.query(ComparisonSession).filter(ComparisonSession.id == comparison_id).first()
@@ -62,93 +76,246 @@ def process_multi_documents(comparison_id: str):
             raise ValueError(f"ComparisonSession {comparison_id} not found")
 
         def _update_session_stage(stage: str, progress: int):
-            session.processing_stage = stage
-            session.progress_percent = progress
-            db.commit()
+            # Same progress pattern as processing_worker._update_stage: on
+            # PostgreSQL the write rides the AUTOCOMMIT engine so it never
+            # commits the worker session's transaction
+            if autocommit_engine is None:
+                session.processing_stage = stage
+                session.progress_percent = progress
+                db.commit()
+                return
+            with autocommit_engine.connect() as conn:
+                conn.execute(
+                    text(
+                        "UPDATE comparison_sessions SET processing_stage = :stage, "
+                        "progress_percent = :progress WHERE id = :sid"
+                    ),
+                    {"stage": stage, "progress": progress, "sid": session.id},
+                )
+            set_committed_value(session, "processing_stage", stage)
+            set_committed_value(session, "progress_percent", progress)
 
         session.status = "processing"
         session.started_at = datetime.now(timezone.utc)
+        db.commit()  # status flip rides its own commit so pollers see it at once
         _update_session_stage("preparing", 5)
 
-        document_ids: List[str] = json.loads(session.document_ids)
+        document_ids: List[str] = list(session.document_ids or [])
         logger.info(f"[Multi] Starting comparison {comparison_id} for {len(document_ids)} documents")
 
         # ── 1. Ensure each document is processed (clauses + embeddings) ──
+        # Documents are independent until step 2, and the per-doc work is
+        # dominated by the Supabase download and model calls that release
+        # the GIL — so unprocessed docs are prepared concurrently, each on
+        # its own session (SQLAlchemy sessions are not thread-safe)
         _update_session_stage("extracting", 10)
         doc_clauses: Dict[str, List[Clause]] = {}  # doc_id -> [Clause]
 
-        for doc_id in document_ids:
-            doc = db.query(Document).filter(Document.id == doc_id).first()
-            if not doc:
-                raise ValueError(f"Document {doc_id} not found")
-
-            existing_clauses = (
-                db.query(Clause)
-                .filter(Clause.document_id == doc_id, Clause.embedding.isnot(None))
-                .order_by(Clause.position)
-                .all()
-            )
-
-            if existing_clauses:
-                logger.info(f"[Multi] Reusing {len(existing_clauses)} existing clauses for doc {doc.name}")
-                doc_clauses[doc_id] = existing_clauses
-            else:
-                logger.info(f"[Multi] Processing doc {doc.name} from scratch...")
-                clauses = _process_single_doc_clauses(doc, db)
-                doc_clauses[doc_id] = clauses
-
-        # ── 2. Build a mapping doc_id -> (clause, embedding_vector) ──
+        def _prepare_doc(doc_id: str) -> None:
+            tdb = SessionLocal()
+            try:
+                doc = tdb.query(Document).filter(Document.id == doc_id).first()
+                if not doc:
+                    raise ValueError(f"Document {doc_id} not found")
+                has_clauses = tdb.query(Clause.id).filter(
+                    Clause.document_id == doc_id, Clause.embedding.isnot(None)
+                ).first() is not None
+                if has_clauses:
+                    logger.info(f"[Multi] Reusing existing clauses for doc {doc.name}")
+                else:
+                    logger.info(f"[Multi] Processing doc {doc.name} from scratch...")
+                    _process_single_doc_clauses(doc, tdb)
+            finally:
+                tdb.close()
+
+        if len(document_ids) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(document_ids))) as ex:
+                futures = {ex.submit(_prepare_doc, d): d for d in document_ids}
+                for f in as_completed(futures):
+                    f.result()  # surface the first failure
+        else:
+            for doc_id in document_ids:
+                _prepare_doc(doc_id)
+
+        # Re-read on the worker's own session so the ORM objects used by the
+        # later steps all live in one identity map — one IN query for every
+        # document instead of a round-trip per document
+        doc_clauses = {doc_id: [] for doc_id in document_ids}
+        all_loaded = (
+            db.query(Clause)
+            .filter(Clause.document_id.in_(document_ids), Clause.embedding.isnot(None))
+            .order_by(Clause.document_id, Clause.position)
+            .all()
+        )
+        for c in all_loaded:
+            doc_clauses[c.document_id].append(c)
+
+        # Plain-dict view of clause texts: the candidate loops below read a
+        # clause's text once per pair it appears in, and dict lookups skip
+        # the ORM attribute instrumentation on every access
+        texts_by_id: Dict[str, str] = {
+            c.id: c.text for cs in doc_clauses.values() for c in cs
+        }
+
+        # ── 2. Build one global float32 embedding matrix, normalized once ──
+        # Each document owns a contiguous row slice; the pair loop below
+        # works on views into this buffer, so no document is re-stacked or
+        # re-normalized per partner
         _update_session_stage("embedding", 30)
-        doc_embeddings: Dict[str, List[Tuple[Clause, np.ndarray]]] = {}
+        doc_emb_clauses: Dict[str, List[Clause]] = {}  # doc_id -> clauses with embeddings
+        doc_slices: Dict[str, slice] = {}              # doc_id -> row range in E
+        doc_matrices: List[np.ndarray] = []
+        row = 0
         for doc_id, clauses in doc_clauses.items():
-            pairs = []
-            for c in clauses:
-                if c.embedding is not None:
-                    pairs.append((c, np.array(c.embedding)))
-            doc_embeddings[doc_id] = pairs
-            logger.info(f"[Multi] Doc {doc_id}: {len(pairs)} clauses with embeddings")
+            with_emb = [c for c in clauses if c.embedding is not None]
+            doc_emb_clauses[doc_id] = with_emb
+            if with_emb:
+                # Already-normalized float32 rows from the per-document
+                # matrix cache — re-running a comparison skips the N
+                # list→array conversions entirely
+                doc_matrices.append(normalized_doc_matrix(doc_id, with_emb))
+                doc_slices[doc_id] = slice(row, row + len(with_emb))
+                row += len(with_emb)
+            logger.info(f"[Multi] Doc {doc_id}: {len(with_emb)} clauses with embeddings")
+
+        E = np.vstack(doc_matrices) if doc_matrices else np.empty((0, 0), dtype=np.float32)
+
+        # int8 copy for the similarity scan (float32 E stays around for any
+        # exact rework downstream); only worth building when the int8
+        # SimSIMD kernel can actually consume it
+        E_i8 = None
+        if simsimd is not None and E.size and E.shape[1] >= 128:
+            E_i8 = quantize_i8(E)
+
+        # Content-word sets for the overlap filter, tokenized once per
+        # clause and cached by clause id. The filter is applied inline as
+        # candidates are emitted (similarity scan + rule admission) instead
+        # of as a separate pass over the assembled pair list
+        word_sets: Dict[str, frozenset] = {}
+
+        def _content_words(text: str, clause_id: str) -> frozenset:
+            ws = word_sets.get(clause_id)
+            if ws is None:
+                ws = frozenset(WORD_RE.findall(text.lower())) - STOP_WORDS
+                word_sets[clause_id] = ws
+            return ws
+
+        def _overlap_ok(clause_a: Clause, clause_b: Clause) -> bool:
+            wa = _content_words(texts_by_id[clause_a.id], clause_a.id)
+            wb = _content_words(texts_by_id[clause_b.id], clause_b.id)
+            if wa and wb:
+                # Require substantial shared vocabulary — same/similar structure
+                return len(wa & wb) / max(len(wa), len(wb)) >= 0.30
+            return True
 
         # ── 3. Cross-document similarity search ──
         _update_session_stage("similarity", 45)
         candidate_pairs: List[Tuple[Clause, Clause, float, str, str]] = []
-        doc_id_list = list(doc_embeddings.keys())
+        doc_id_list = list(doc_emb_clauses.keys())
+
+        # One GEMM over the whole matrix beats D·(D-1)/2 small ones on BLAS
+        # launch and allocation overhead; the unused same-doc blocks are
+        # cheap at these sizes (≤500 clauses/doc). The pair loop then just
+        # slices blocks out of S. Falls back to per-pair products when the
+        # full N×N buffer would be too large
+        S = None
+        if len(doc_id_list) > 2 and 0 < E.shape[0] <= FULL_SIM_MAX_ROWS:
+            if E_i8 is not None:
+                S = 1.0 - np.asarray(simsimd.cdist(E_i8, E_i8, metric="cos"))
+            else:
+                S = E @ E.T
 
         for i in range(len(doc_id_list)):
             for j in range(i + 1, len(doc_id_list)):
                 doc_a_id = doc_id_list[i]
                 doc_b_id = doc_id_list[j]
-                pairs_a = doc_embeddings[doc_a_id]
-                pairs_b = doc_embeddings[doc_b_id]
 
-                if not pairs_a or not pairs_b:
+                if doc_a_id not in doc_slices or doc_b_id not in doc_slices:
                     continue
-
-                # Vectorized cosine similarity matrix for speed
-                emb_a = np.array([p[1] for p in pairs_a])
-                emb_b = np.array([p[1] for p in pairs_b])
-
-                # Normalize
-                norms_a = np.linalg.norm(emb_a, axis=1, keepdims=True)
-                norms_b = np.linalg.norm(emb_b, axis=1, keepdims=True)
-                emb_a_norm = emb_a / (norms_a + 1e-10)
-                emb_b_norm = emb_b / (norms_b + 1e-10)
-
-                # Cosine similarity matrix: (n_a, n_b)
-                sim_matrix = emb_a_norm @ emb_b_norm.T
-
-                # Extract pairs above threshold
-                indices = np.argwhere(sim_matrix >= CROSS_DOC_SIMILARITY_THRESHOLD)
-                for idx_a, idx_b in indices:
-                    clause_a = pairs_a[idx_a][0]
-                    clause_b = pairs_b[idx_b][0]
-                    score = float(sim_matrix[idx_a, idx_b])
+                clauses_a = doc_emb_clauses[doc_a_id]
+                clauses_b = doc_emb_clauses[doc_b_id]
+
+                # Cosine similarity matrix: (n_a, n_b) — a block of the
+                # global product when it was precomputed, otherwise one GEMM
+                # per pair on row views of the shared normalized buffer.
+                # SimSIMD's int8 batch cosine kernel when available (runtime
+                # dispatch to VNNI/AVX-512/NEON, 4× less memory traffic);
+                # skipped for small dims where dispatch overhead outweighs
+                # the kernel win
+                if S is not None:
+                    sim_matrix = S[doc_slices[doc_a_id], doc_slices[doc_b_id]]
+                elif E_i8 is not None:
+                    sim_matrix = 1.0 - np.asarray(
+                        simsimd.cdist(E_i8[doc_slices[doc_a_id]], E_i8[doc_slices[doc_b_id]], metric="cos")
+                    )
+                else:
+                    sim_matrix = E[doc_slices[doc_a_id]] @ E[doc_slices[doc_b_id]].T
+
+                # Extract pairs above threshold, overlap-filtered on the spot
+                # so low-overlap candidates never reach the NLI pair list.
+                # Indices and scores come out as plain Python values in bulk
+                # — no per-element numpy scalar indexing or float() casts
+                mask = sim_matrix >= CROSS_DOC_SIMILARITY_THRESHOLD
+                # On paraphrase-heavy documents the threshold alone can pass
+                # O(n·m) hits, each one an NLI forward pass. Keep a pair only
+                # if it is among its row's or its column's top-K scores —
+                # argpartition, no full sort — bounding the emitted set to
+                # O((n+m)·K). When either side has ≤ K clauses every pair is
+                # already in a top-K set, so the cap is skipped
+                if min(sim_matrix.shape) > TOP_K_PER_CLAUSE:
+                    topk = np.zeros_like(mask)
+                    col_idx = np.argpartition(-sim_matrix, TOP_K_PER_CLAUSE, axis=1)[:, :TOP_K_PER_CLAUSE]
+                    np.put_along_axis(topk, col_idx, True, axis=1)
+                    row_idx = np.argpartition(-sim_matrix, TOP_K_PER_CLAUSE, axis=0)[:TOP_K_PER_CLAUSE, :]
+                    np.put_along_axis(topk, row_idx, True, axis=0)
+                    mask &= topk
+
+                rows, cols = np.nonzero(mask)
+                scores = sim_matrix[rows, cols].tolist()
+                kept = 0
+                for idx_a, idx_b, score in zip(rows.tolist(), cols.tolist(), scores):
+                    clause_a = clauses_a[idx_a]
+                    clause_b = clauses_b[idx_b]
+                    if not _overlap_ok(clause_a, clause_b):
+                        continue
                     candidate_pairs.append((clause_a, clause_b, score, doc_a_id, doc_b_id))
+                    kept += 1
 
                 logger.info(
                     f"[Multi] Docs ({doc_a_id[:8]}.. vs {doc_b_id[:8]}..): "
-                    f"{len(indices)} similar clause pairs found"
+                    f"{kept}/{len(scores)} similar clause pairs kept"
                 )
 
+        # ── 3c. Start NLI on similarity candidates while rules run ──
+        # The cross-encoder pass over similarity candidates has no data
+        # dependency on the rule checks, so it runs on a background thread
+        # (own session — the score cache commits independently) and its
+        # latency hides behind step 4; rule-originated pairs get a smaller
+        # follow-up pass afterwards
+        nli_pairs = []
+        pair_meta = []  # track doc IDs for each NLI pair
+        seen_pair_keys = set()  # B14: deduplicate candidate pairs
+
+        for clause_a, clause_b, sim_score, doc_a_id, doc_b_id in candidate_pairs:
+            pair_key = tuple(sorted([clause_a.id, clause_b.id]))
+            if pair_key not in seen_pair_keys:
+                seen_pair_keys.add(pair_key)
+                nli_pairs.append((texts_by_id[clause_a.id], texts_by_id[clause_b.id], clause_a.id, clause_b.id))
+                pair_meta.append((doc_a_id, doc_b_id))
+
+        def _nli_on_own_session(pairs: List[Tuple[str, str, str, str]]) -> List[Dict]:
+            tdb = SessionLocal()
+            try:
+                return batch_nli_check_cached(pairs, tdb)
+            finally:
+                tdb.close()
+
+        sim_nli_future = None
+        if nli_pairs:
+            logger.info(f"[Multi] Dispatching NLI for {len(nli_pairs)} similarity pairs in background...")
+            nli_executor = ThreadPoolExecutor(max_workers=1)
+            sim_nli_future = nli_executor.submit(_nli_on_own_session, list(nli_pairs))
+
         # ── 3b. Build global entities map for NER-aware rule checking ──
         global_entities_map: Dict[str, Dict] = {}
         for doc_id, clauses in doc_clauses.items():
@@ -157,89 +324,63 @@ def process_multi_documents(comparison_id: str):
                     global_entities_map[c.id] = c.entities
 
         # ── 4. Cross-document rule-based checks (NER-enhanced) ──
+        # One pass over the union of all clauses instead of one run per
+        # document pair: each cross-doc clause pair is still examined exactly
+        # once, but intra-doc pairs are no longer re-checked N-1 times, and
+        # the common two-document case is a single straight-line run
         _update_session_stage("rules", 58)
+        clause_doc_map = {
+            c.id: doc_id for doc_id in doc_id_list for c in doc_clauses[doc_id]
+        }
+        all_clauses = [c for doc_id in doc_id_list for c in doc_clauses[doc_id]]
+        violations = check_contradictions_batch(all_clauses, entities_map=global_entities_map)
+
+        # Keep only cross-document violations
         rule_violations: List[Dict] = []
-        for i in range(len(doc_id_list)):
-            for j in range(i + 1, len(doc_id_list)):
-                doc_a_id = doc_id_list[i]
-                doc_b_id = doc_id_list[j]
-                combined_clauses = doc_clauses[doc_a_id] + doc_clauses[doc_b_id]
-                boundary = len(doc_clauses[doc_a_id])
-
-                # Run rule checker on the combined set (with entities)
-                violations = check_contradictions_batch(combined_clauses, entities_map=global_entities_map)
-
-                # Build a clause-id → position map (avoids .index() identity issues)
-                clause_pos_map = {c.id: idx for idx, c in enumerate(combined_clauses)}
-
-                # Keep only cross-document violations
-                for v in violations:
-                    ca = v["clause_a"]
-                    cb = v["clause_b"]
-                    pos_a = clause_pos_map.get(ca.id)
-                    pos_b = clause_pos_map.get(cb.id)
-                    if pos_a is None or pos_b is None:
-                        continue  # safety guard
-                    is_cross = (pos_a < boundary) != (pos_b < boundary)
-                    if is_cross:
-                        v["document_a_id"] = doc_a_id if pos_a < boundary else doc_b_id
-                        v["document_b_id"] = doc_b_id if pos_a < boundary else doc_a_id
-                        rule_violations.append(v)
+        for v in violations:
+            doc_a_id = clause_doc_map.get(v["clause_a"].id)
+            doc_b_id = clause_doc_map.get(v["clause_b"].id)
+            if doc_a_id is None or doc_b_id is None:
+                continue  # safety guard
+            if doc_a_id != doc_b_id:
+                v["document_a_id"] = doc_a_id
+                v["document_b_id"] = doc_b_id
+                rule_violations.append(v)
 
         logger.info(f"[Multi] {len(rule_violations)} cross-doc rule violations found")
 
-        # ── 5. NLI verification on all candidates ──
+        # ── 5. NLI verification on the remaining (rule-originated) pairs ──
         _update_session_stage("nli", 70)
-        nli_pairs = []
-        pair_meta = []  # track doc IDs for each NLI pair
-        seen_pair_keys = set()  # B14: deduplicate candidate pairs
-
-        for clause_a, clause_b, sim_score, doc_a_id, doc_b_id in candidate_pairs:
-            pair_key = tuple(sorted([clause_a.id, clause_b.id]))
-            if pair_key not in seen_pair_keys:
-                seen_pair_keys.add(pair_key)
-                nli_pairs.append((clause_a.text, clause_b.text, clause_a.id, clause_b.id))
-                pair_meta.append((doc_a_id, doc_b_id))
-
+        rule_nli_pairs = []
         for v in rule_violations:
             pair_key = tuple(sorted([v["clause_a"].id, v["clause_b"].id]))
-            if pair_key not in seen_pair_keys:
+            if pair_key not in seen_pair_keys and _overlap_ok(v["clause_a"], v["clause_b"]):
                 seen_pair_keys.add(pair_key)
-                nli_pairs.append((
-                    v["clause_a"].text, v["clause_b"].text,
+                pair = (
+                    texts_by_id[v["clause_a"].id], texts_by_id[v["clause_b"].id],
                     v["clause_a"].id, v["clause_b"].id
-                ))
+                )
+                nli_pairs.append(pair)
+                rule_nli_pairs.append(pair)
                 pair_meta.append((v["document_a_id"], v["document_b_id"]))
 
         # Clear existing cross contradictions for this session
         db.query(CrossContradiction).filter(CrossContradiction.comparison_id == comparison_id).delete()
         db.commit()
 
-        stored_count = 0
+        cross_rows = []
 
-        # Pre-filter: drop pairs with very low content-word overlap
-        if nli_pairs:
-            filtered = []
-            filtered_meta = []
-            for idx, (text_a, text_b, id_a, id_b) in enumerate(nli_pairs):
-                wa = {w for w in text_a.lower().split() if w not in STOP_WORDS and len(w) > 2}
-                wb = {w for w in text_b.lower().split() if w not in STOP_WORDS and len(w) > 2}
-                if wa and wb:
-                    overlap = len(wa & wb) / max(len(wa), len(wb))
-                    # Require substantial shared vocabulary — same/similar structure
-                    if overlap < 0.30:
-                        continue
-                filtered.append((text_a, text_b, id_a, id_b))
-                filtered_meta.append(pair_meta[idx])
-            logger.info(f"[Multi] Word-overlap filter: {len(nli_pairs)} → {len(filtered)} pairs")
-            nli_pairs = filtered
-            pair_meta = filtered_meta
+        # Join the background pass, then score what the rules added
+        nli_results: List[Dict] = []
+        if sim_nli_future is not None:
+            nli_results.extend(sim_nli_future.result())
+        if rule_nli_pairs:
+            logger.info(f"[Multi] Running NLI on {len(rule_nli_pairs)} rule-originated pairs...")
+            nli_results.extend(batch_nli_check_cached(rule_nli_pairs, db))
 
-        if nli_pairs:
+        if nli_results:
             _update_session_stage("nli", 78)
-            logger.info(f"[Multi] Running NLI verification on {len(nli_pairs)} candidate pairs...")
-            nli_results = batch_nli_check(nli_pairs)
-            logger.info("[Multi] NLI verification complete")
+            logger.info(f"[Multi] NLI verification complete for {len(nli_results)} candidate pairs")
 
             # Build rule map for fast lookup
             rule_map_cross = {}
@@ -247,6 +388,8 @@ def process_multi_documents(comparison_id: str):
                 rk = tuple(sorted([v["clause_a"].id, v["clause_b"].id]))
                 rule_map_cross[rk] = v
 
+            pair_text_map = build_pair_text_map(nli_pairs)
+
             # ── 6. Store cross-document contradictions ──
             _update_session_stage("storing", 90)
             seen_pairs = set()  # Deduplicate
@@ -303,10 +446,10 @@ def process_multi_documents(comparison_id: str):
                     cc_type = "semantic"
                     cc_desc = build_semantic_description(
                         result["clause_a_id"], result["clause_b_id"],
-                        nli_pairs, c_conf_pct
+                        pair_text_map, c_conf_pct
                     )
 
-                cc = CrossContradiction(
+                cross_rows.append(dict(
                     id=str(uuid.uuid4()),
                     comparison_id=comparison_id,
                     clause_a_id=result["clause_a_id"],
@@ -317,20 +460,25 @@ def process_multi_documents(comparison_id: str):
                     severity=severity,
                     description=cc_desc,
                     confidence=c_conf_pct,
-                )
-                db.add(cc)
-                stored_count += 1
+                ))
 
-        session.total_cross_contradictions = stored_count
+        # Single batched INSERT instead of one per contradiction
+        if cross_rows:
+            db.bulk_insert_mappings(CrossContradiction, cross_rows)
+
+        session.total_cross_contradictions = len(cross_rows)
         session.status = "completed"
         session.processing_stage = "completed"
         session.progress_percent = 100
         session.completed_at = datetime.now(timezone.utc)
         db.commit()
 
+        # Refresh the precomputed dashboard stats now that results changed
+        refresh_dashboard_stats(session.user_id, db)
+
         logger.info(
             f"[Multi] Comparison {comparison_id} complete: "
-            f"{stored_count} cross-document contradictions stored"
+            f"{len(cross_rows)} cross-document contradictions stored"
         )
 
     except Exception as e:
@@ -345,6 +493,8 @@ def process_multi_documents(comparison_id: str):
             logger.error(f"[Multi] Could not update status to failed: {inner_e}")
         raise
     finally:
+        if nli_executor is not None:
+            nli_executor.shutdown(wait=False)
         db.close()
 
 
@@ -353,12 +503,9 @@ def _process_single_doc_clauses(doc: Document, db) -> List[Clause]:
     Process a single document: download → extract → segment → embed → store clauses.
     Reuses the same pipeline as the single-doc worker but operates within the caller's session.
     """
-    # Download file from Supabase
+    # Download file from Supabase over the shared keep-alive client
     signed_url = get_signed_url(doc.file_path, expires_in=300)
-    with httpx.Client() as client:
-        response = client.get(signed_url)
-        response.raise_for_status()
-        file_content = response.content
+    file_content = download_file(signed_url)
 
     # Clean existing data for this doc (FK-safe order: contradictions → clauses)
     existing_clause_ids = [
@@ -373,12 +520,8 @@ def _process_single_doc_clauses(doc: Document, db) -> List[Clause]:
     db.query(Clause).filter(Clause.document_id == doc.id).delete()
     db.commit()
 
-    # Extract text
-    raw_text = extract_and_clean_text(file_content, doc.name)
-    logger.info(f"[Multi] Extracted {len(raw_text)} chars from {doc.name}")
-
-    # Segment clauses
-    clause_texts = segment_clauses(raw_text)
+    # Extract and segment page by page — the full document string is never built
+    clause_texts = segment_clauses_stream(extract_and_clean_pages(file_content, doc.name))
     logger.info(f"[Multi] Segmented {len(clause_texts)} clauses from {doc.name}")
 
     # Guard against pathologically long documents
@@ -419,24 +562,21 @@ def _process_single_doc_clauses(doc: Document, db) -> List[Clause]:
     # Generate embeddings
     logger.info(f"[Multi] Generating embeddings for {len(clauses)} clauses...")
     texts_for_emb = [c.text for c in clauses]
-    embeddings = generate_embeddings_batch(texts_for_emb)
-
-    for clause, embedding in zip(clauses, embeddings):
-        clause.embedding = embedding
+    embeddings = generate_embeddings_cached(texts_for_emb, db)
 
     # NER – extract named entities (batch)
     logger.info(f"[Multi] Extracting named entities for {len(clauses)} clauses...")
     ner_results = extract_entities_batch(texts_for_emb)
-    for clause, ents in zip(clauses, ner_results):
-        clause.entities = ents if ents else None
-
-    # Update search vectors (PostgreSQL only)
-    if not settings.DATABASE_URL.startswith("sqlite"):
-        from sqlalchemy import text
-        db.execute(
-            text("UPDATE clauses SET search_vector = to_tsvector('english', text) WHERE document_id = :doc_id"),
-            {"doc_id": doc.id},
-        )
+
+    # One batched UPDATE for embeddings and entities together, instead of
+    # relying on dirty-attribute tracking to emit N UPDATEs at commit time
+    db.bulk_update_mappings(Clause, [
+        {"id": c.id, "embedding": emb, "entities": (ents if ents else None)}
+        for c, emb, ents in zip(clauses, embeddings, ner_results)
+    ])
+
+    # search_vector needs no backfill: on PostgreSQL it's a STORED
+    # generated column filled at INSERT time
     db.commit()
 
     # Mark doc as completed if it was pending
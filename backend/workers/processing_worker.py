@@ -1,36 +1,68 @@
 """Processing worker for document analysis pipeline."""
 import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, text
 from datetime import datetime, timezone
 
 from models.document import Document
 from models.clause import Clause
 from models.contradiction import Contradiction
-from utils.text_extractor import extract_and_clean_text
-from utils.clause_segmenter import segment_clauses
-from utils.description_builder import build_semantic_description
-from services.supabase_storage import get_signed_url
-from services.embedding_service import generate_embeddings_batch
+from utils.text_extractor import extract_and_clean_pages
+from utils.clause_segmenter import segment_clauses_stream
+from utils.description_builder import build_pair_text_map, build_semantic_description
+from services.supabase_storage import download_file, get_signed_url
+from services.embedding_service import (
+    generate_embeddings_cached,
+    invalidate_doc_matrix,
+    normalized_doc_matrix,
+    quantize_i8,
+)
 from services.rule_checker import check_contradictions_batch
-from services.nli_service import batch_nli_check
+from services.nli_service import batch_nli_check_cached
 from services.ner_service import extract_entities_batch
-from constants import STOP_WORDS
+from services.dashboard_stats import refresh_dashboard_stats
+from constants import STOP_WORDS, WORD_RE
 from config import settings
-import httpx
 import numpy as np
 
+try:
+    import simsimd  # SIMD (AVX-512/NEON) cosine kernels
+except ImportError:
+    simsimd = None
+
 logger = logging.getLogger(__name__)
 
-from db.session import SessionLocal
+from db.session import SessionLocal, autocommit_engine
 
 
 def _update_stage(db, doc, stage: str, progress: int):
-    """Update the document's processing stage and progress percent."""
-    doc.processing_stage = stage
-    doc.progress_percent = progress
-    db.commit()
+    """Update the document's processing stage and progress percent.
+
+    On PostgreSQL the write goes out on the shared AUTOCOMMIT engine so
+    progress becomes visible to pollers without committing (fsyncing) the
+    worker session's transaction; the in-session object is mirrored with
+    set_committed_value. SQLite keeps the plain commit — its shared
+    StaticPool connection can't take a side write, and local commits are
+    cheap.
+    """
+    if autocommit_engine is None:
+        doc.processing_stage = stage
+        doc.progress_percent = progress
+        db.commit()
+        return
+    with autocommit_engine.connect() as conn:
+        conn.execute(
+            text(
+                "UPDATE documents SET processing_stage = :stage, "
+                "progress_percent = :progress WHERE id = :doc_id"
+            ),
+            {"stage": stage, "progress": progress, "doc_id": doc.id},
+        )
+    set_committed_value(doc, "processing_stage", stage)
+    set_committed_value(doc, "progress_percent", progress)
 
 
 def process_document(document_id: str):
@@ -49,29 +81,26 @@ def process_document(document_id: str):
         doc.status = "processing"
         doc.analysis_start_time = datetime.now(timezone.utc)
         doc.analysis_end_time = None
+        db.commit()  # status flip rides its own commit so pollers see it at once
         _update_stage(db, doc, "downloading", 5)
         
-        # 2. Download file from Supabase
+        # 2. Download file from Supabase over the shared keep-alive client
         signed_url = get_signed_url(doc.file_path, expires_in=300)
-        with httpx.Client() as client:
-            response = client.get(signed_url)
-            response.raise_for_status()
-            file_content = response.content
+        file_content = download_file(signed_url)
         
         # 3. Cleanup existing data (prevent duplication)
         logger.info(f"Clearing existing clauses and contradictions for document {document_id}...")
         db.query(Contradiction).filter(Contradiction.document_id == document_id).delete()
         db.query(Clause).filter(Clause.document_id == document_id).delete()
+        doc.contradiction_count = 0
+        invalidate_doc_matrix(document_id)
         db.commit()
 
-        # 4. Extract text
+        # 4. Extract and segment page by page — the full document string
+        # is never built, so peak memory stays at per-page size
         _update_stage(db, doc, "extracting", 15)
-        raw_text = extract_and_clean_text(file_content, doc.name)
-        logger.info(f"Extracted {len(raw_text)} chars from {doc.name}")
-        
-        # 4. Segment clauses
+        clause_texts = segment_clauses_stream(extract_and_clean_pages(file_content, doc.name))
         _update_stage(db, doc, "segmenting", 25)
-        clause_texts = segment_clauses(raw_text)
         logger.info(f"Segmented {len(clause_texts)} clauses")
 
         # Guard against pathologically long documents
@@ -83,108 +112,170 @@ def process_document(document_id: str):
             )
             clause_texts = clause_texts[:MAX_CLAUSES]
         
-        # 5. Bulk insert clauses
-        clauses = []
-        for i, text in enumerate(clause_texts):
-            clause = Clause(
+        # 5. Bulk insert clauses — COPY on PostgreSQL streams all rows in one
+        # protocol message with no per-row INSERT overhead; psycopg handles
+        # the escaping. Small batches and SQLite keep the ORM bulk save
+        # (section stays NULL for now — TODO: extract section headings)
+        clauses = [
+            Clause(
                 id=str(uuid.uuid4()),
                 document_id=document_id,
                 text=text,
                 position=i,
-                section=None  # TODO: extract section headings
+                section=None,
             )
-            clauses.append(clause)
-        
-        db.bulk_save_objects(clauses)
-        db.commit()
-        
-        # Re-fetch clauses to get their IDs and ensure they are attached to current session
-        clauses = db.query(Clause).filter(Clause.document_id == document_id).order_by(Clause.position).all()
-        
+            for i, text in enumerate(clause_texts)
+        ]
+        if settings.DATABASE_URL.startswith("postgresql") and len(clauses) >= 100:
+            raw = db.connection().connection  # psycopg connection
+            with raw.cursor() as cur:
+                with cur.copy("COPY clauses (id, document_id, text, position) FROM STDIN") as copy:
+                    for c in clauses:
+                        copy.write_row((c.id, c.document_id, c.text, c.position))
+            db.commit()
+        else:
+            db.bulk_save_objects(clauses)
+            db.commit()
+
+        # No re-fetch: ids are generated client-side, so the in-memory list
+        # already carries everything the later steps read. Column writes
+        # below go through bulk UPDATEs keyed on id, which don't need
+        # session-attached instances
+
         # 6. Generate embeddings (batch)
         _update_stage(db, doc, "embedding", 40)
         logger.info(f"Generating embeddings for {len(clauses)} clauses...")
         clause_texts_for_emb = [c.text for c in clauses]
-        embeddings = generate_embeddings_batch(clause_texts_for_emb)
+        embeddings = generate_embeddings_cached(clause_texts_for_emb, db)
         logger.info("Embeddings generation complete")
         
+        # One batched UPDATE instead of N dirty-attribute UPDATEs at flush.
+        # set_committed_value mirrors each vector onto its in-session object
+        # (step 8 reads c.embedding) without marking it dirty again
+        db.bulk_update_mappings(Clause, [
+            {"id": c.id, "embedding": emb} for c, emb in zip(clauses, embeddings)
+        ])
         for clause, embedding in zip(clauses, embeddings):
-            clause.embedding = embedding
-        
-        # Update search vectors (PostgreSQL only)
-        if not settings.DATABASE_URL.startswith("sqlite"):
-            logger.info("Updating search vectors for full-text search...")
-            from sqlalchemy import text
-            db.execute(
-                text("UPDATE clauses SET search_vector = to_tsvector('english', text) WHERE document_id = :doc_id"),
-                {"doc_id": document_id}
-            )
+            set_committed_value(clause, "embedding", embedding)
+
+
+        # search_vector needs no backfill: on PostgreSQL it's a STORED
+        # generated column filled at INSERT time
         db.commit()
         
-        # 7. NER – extract named entities for all clauses (batch)
+        # 7–9. NER, similarity, and rule checks overlap: NER and the
+        # similarity product are independent of each other, and the rule
+        # checks only need NER's entities_map — so they chain off the NER
+        # future while the similarity matmul may still be running. None of
+        # the thread-side work touches the session; spaCy and the BLAS
+        # product release the GIL, so the stages genuinely run in parallel
         _update_stage(db, doc, "ner", 55)
-        logger.info(f"Extracting named entities for {len(clauses)} clauses...")
+        logger.info(f"Extracting entities / similarity / rules for {len(clauses)} clauses...")
+
+        def _compute_similar_pairs():
+            valid_clauses = [c for c in clauses if c.embedding is not None]
+            if len(valid_clauses) < 2:
+                return []
+            # Row-normalized float32 matrix from the per-document cache —
+            # one sgemm at half the bandwidth of a float64 product, and the
+            # cache is pre-warmed for later similarity lookups
+            emb_norm = normalized_doc_matrix(document_id, valid_clauses)
+
+            # Extract upper-triangle pairs above threshold (avoid self and
+            # duplicates). High threshold: only near-paraphrase clauses
+            # (same structure) are candidates. triu_indices sidesteps the
+            # N×N boolean triangle mask
+            iu_r, iu_c = np.triu_indices(len(valid_clauses), k=1)
+            if simsimd is not None and emb_norm.shape[1] >= 128:
+                # int8 VNNI/NEON screen at 0.80, then a float32 re-rank of
+                # the survivors makes the final 0.82 decision exact
+                q = quantize_i8(emb_norm)
+                sim_matrix = 1.0 - np.asarray(simsimd.cdist(q, q, metric="cos"))
+                cand = np.nonzero(sim_matrix[iu_r, iu_c] >= 0.80)[0]
+                ra, rb = iu_r[cand], iu_c[cand]
+                exact = np.einsum("ij,ij->i", emb_norm[ra], emb_norm[rb])
+                keep = exact >= 0.82
+                ra, rb, scores = ra[keep], rb[keep], exact[keep]
+            else:
+                sim_matrix = emb_norm @ emb_norm.T
+                hits = np.nonzero(sim_matrix[iu_r, iu_c] >= 0.82)[0]
+                ra, rb = iu_r[hits], iu_c[hits]
+                scores = sim_matrix[ra, rb]
+            # One comprehension over the C-level tolist()'d arrays — no
+            # per-pair append/attribute lookups in the hot loop
+            return [
+                (valid_clauses[a], valid_clauses[b], s)
+                for a, b, s in zip(ra.tolist(), rb.tolist(), scores.tolist())
+            ]
+
         clause_texts_for_ner = [c.text for c in clauses]
-        all_entities = extract_entities_batch(clause_texts_for_ner)
-        entities_map = {}
-        for clause, ents in zip(clauses, all_entities):
-            clause.entities = ents if ents else None
-            entities_map[clause.id] = ents
-        db.commit()
-        logger.info("NER extraction complete")
-
-        # 8. Find similar clause pairs — vectorized matrix multiply (fast)
-        _update_stage(db, doc, "similarity", 65)
-        logger.info("Identifying candidate contradiction pairs (vectorized)...")
-        similar_pairs = []
-        emb_list = [c.embedding for c in clauses if c.embedding is not None]
-        valid_clauses = [c for c in clauses if c.embedding is not None]
-
-        if len(valid_clauses) > 1:
-            emb_matrix = np.array(emb_list)
-            norms = np.linalg.norm(emb_matrix, axis=1, keepdims=True)
-            emb_norm = emb_matrix / (norms + 1e-10)
-            sim_matrix = emb_norm @ emb_norm.T
-
-            # Extract upper-triangle pairs above threshold (avoid self and duplicates)
-            # High threshold: only near-paraphrase clauses (same structure) are candidates
-            indices = np.argwhere((sim_matrix >= 0.82) & (np.triu(np.ones_like(sim_matrix, dtype=bool), k=1)))
-            for idx_a, idx_b in indices:
-                similar_pairs.append((valid_clauses[idx_a], valid_clauses[idx_b], float(sim_matrix[idx_a, idx_b])))
+        with ThreadPoolExecutor(max_workers=2) as stage_pool:
+            fut_ents = stage_pool.submit(extract_entities_batch, clause_texts_for_ner)
+            fut_sim = stage_pool.submit(_compute_similar_pairs)
+
+            all_entities = fut_ents.result()
+            entities_map = {}
+            for clause, ents in zip(clauses, all_entities):
+                set_committed_value(clause, "entities", ents if ents else None)
+                entities_map[clause.id] = ents
+            db.bulk_update_mappings(Clause, [
+                {"id": c.id, "entities": (ents if ents else None)}
+                for c, ents in zip(clauses, all_entities)
+            ])
+            db.commit()
+            logger.info("NER extraction complete")
+
+            # Rule checks run on the main thread, overlapping whatever is
+            # left of the similarity product
+            _update_stage(db, doc, "rules", 72)
+            rule_violations = check_contradictions_batch(clauses, entities_map=entities_map)
+
+            similar_pairs = fut_sim.result()
 
         logger.info(f"Found {len(similar_pairs)} similar clause pairs")
 
-        # 9. Rule-based checks (now includes NER entity-based detection)
-        _update_stage(db, doc, "rules", 72)
-        logger.info("Running rule-based contradiction checks (with NER)...")
-        rule_violations = check_contradictions_batch(clauses, entities_map=entities_map)
+        # 10. Merge all candidates, deduplicate, and NLI-verify everything.
+        # Pairs are keyed by packed clause indices instead of sorted UUID
+        # tuples: hashing a small int is a single machine word, while every
+        # UUID-string key re-hashed 36 characters twice plus a sort
+        id2idx = {c.id: i for i, c in enumerate(clauses)}
+
+        def _pair_key(id_a: str, id_b: str) -> int:
+            a, b = id2idx[id_a], id2idx[id_b]
+            return (a << 32) | b if a < b else (b << 32) | a
 
-        # 10. Merge all candidates, deduplicate, and NLI-verify everything
         seen_pair_keys = set()
         nli_pairs = []
 
         for clause_a, clause_b, _ in similar_pairs:
-            pair_key = tuple(sorted([clause_a.id, clause_b.id]))
+            pair_key = _pair_key(clause_a.id, clause_b.id)
             if pair_key not in seen_pair_keys:
                 seen_pair_keys.add(pair_key)
                 nli_pairs.append((clause_a.text, clause_b.text, clause_a.id, clause_b.id))
 
         # Track which rule violations exist so we can tag type/severity after NLI
-        rule_map = {}  # (id_a, id_b) -> violation dict
+        rule_map = {}  # packed pair key -> violation dict
         for violation in rule_violations:
-            pair_key = tuple(sorted([violation["clause_a"].id, violation["clause_b"].id]))
+            pair_key = _pair_key(violation["clause_a"].id, violation["clause_b"].id)
             rule_map[pair_key] = violation
             if pair_key not in seen_pair_keys:
                 seen_pair_keys.add(pair_key)
                 nli_pairs.append((violation["clause_a"].text, violation["clause_b"].text,
                                   violation["clause_a"].id, violation["clause_b"].id))
 
-        # Pre-filter: drop pairs with very low word overlap (unrelated topics)
+        # Pre-filter: drop pairs with very low word overlap (unrelated topics).
+        # Each clause's token set is built exactly once — a clause typically
+        # appears in many candidate pairs, so tokenizing per pair redoes the
+        # same lowercase/split/filter work over and over
         if nli_pairs:
+            clause_tokens = {
+                c.id: frozenset(WORD_RE.findall(c.text.lower())) - STOP_WORDS
+                for c in clauses
+            }
             filtered_nli = []
             for text_a, text_b, id_a, id_b in nli_pairs:
-                wa = {w for w in text_a.lower().split() if w not in STOP_WORDS and len(w) > 2}
-                wb = {w for w in text_b.lower().split() if w not in STOP_WORDS and len(w) > 2}
+                wa = clause_tokens[id_a]
+                wb = clause_tokens[id_b]
                 if wa and wb:
                     overlap = len(wa & wb) / max(len(wa), len(wb))
                     # Require substantial shared vocabulary — same/similar structure
@@ -194,11 +285,13 @@ def process_document(document_id: str):
             logger.info(f"Word-overlap filter: {len(nli_pairs)} → {len(filtered_nli)} pairs")
             nli_pairs = filtered_nli
 
+        contra_rows = []
         if nli_pairs:
             _update_stage(db, doc, "nli", 80)
             logger.info(f"Running NLI verification for {len(nli_pairs)} candidate pairs...")
-            nli_results = batch_nli_check(nli_pairs)
+            nli_results = batch_nli_check_cached(nli_pairs, db)
             logger.info("NLI verification complete")
+            pair_text_map = build_pair_text_map(nli_pairs)
 
             # 11. Store only NLI-verified contradictions
             for result in nli_results:
@@ -206,7 +299,7 @@ def process_document(document_id: str):
                 e_score = result["entailment_score"]
                 n_score = result["neutral_score"]
 
-                pair_key = tuple(sorted([result["clause_a_id"], result["clause_b_id"]]))
+                pair_key = _pair_key(result["clause_a_id"], result["clause_b_id"])
                 rule_v = rule_map.get(pair_key)
                 has_rule_backing = rule_v is not None
 
@@ -246,9 +339,9 @@ def process_document(document_id: str):
                 else:
                     c_desc = build_semantic_description(
                         result["clause_a_id"], result["clause_b_id"],
-                        nli_pairs, c_conf_pct
+                        pair_text_map, c_conf_pct
                     )
-                contradiction = Contradiction(
+                contra_rows.append(dict(
                     id=str(uuid.uuid4()),
                     clause_a_id=result["clause_a_id"],
                     clause_b_id=result["clause_b_id"],
@@ -256,17 +349,24 @@ def process_document(document_id: str):
                     severity=c_severity,
                     description=c_desc,
                     confidence=c_conf_pct,
-                    document_id=document_id
-                )
-                db.add(contradiction)
+                    document_id=document_id,
+                ))
+
+        # Single batched INSERT instead of one per contradiction
+        if contra_rows:
+            db.bulk_insert_mappings(Contradiction, contra_rows)
 
         _update_stage(db, doc, "storing", 90)
-        
+
+        doc.contradiction_count = len(contra_rows)
         doc.status = "completed"
         doc.processing_stage = "completed"
         doc.progress_percent = 100
         doc.analysis_end_time = datetime.now(timezone.utc)
         db.commit()
+
+        # Refresh the precomputed dashboard stats now that results changed
+        refresh_dashboard_stats(doc.user_id, db)
         logger.info(f"Document {document_id} processing complete")
         
     except Exception as e:
@@ -53,11 +53,17 @@ def run_services():
         print("Try deleting backend/venv and running again.")
         sys.exit(1)
 
+    # Each service gets its own process group on Windows so a single
+    # CTRL_BREAK_EVENT reaches uvicorn's reloader and npm's node children
+    # at shutdown — no taskkill subprocesses needed
+    popen_flags = subprocess.CREATE_NEW_PROCESS_GROUP if sys.platform == "win32" else 0
+
     # Start Backend
     print("\nStarting Backend (FastAPI)...")
     backend_process = subprocess.Popen(
         [uvicorn_path, "main:app", "--reload", "--host", "127.0.0.1", "--port", "8000"],
         cwd=backend_dir,
+        creationflags=popen_flags,
     )
 
     # Start Frontend
@@ -66,6 +72,7 @@ def run_services():
     frontend_process = subprocess.Popen(
         [npm_cmd, "run", "dev"],
         cwd=frontend_dir,
+        creationflags=popen_flags,
     )
 
     print("\nServices are running!")
@@ -73,23 +80,43 @@ def run_services():
     print("   React+Vite Frontend: http://localhost:5173 (usually)")
     print("\nPress Ctrl+C to stop both services.\n")
 
+    _wait_for_interrupt()
+
+    print("\n\nStopping services...")
+    _stop_process(backend_process)
+    _stop_process(frontend_process)
+    print("All services stopped.")
+
+
+def _wait_for_interrupt():
+    """Block until Ctrl+C without the old 1 Hz polling loop."""
+    if hasattr(signal, "sigwait"):
+        # POSIX: sleep in the kernel with zero wakeups until a signal lands
+        signal.sigwait({signal.SIGINT, signal.SIGTERM})
+        return
+    # Windows has no sigwait; Ctrl+C interrupts time.sleep, so one long
+    # sleep per hour replaces waking up every second
     try:
-        # Keep the script running
         while True:
-            time.sleep(1)
+            time.sleep(3600)
     except KeyboardInterrupt:
-        print("\n\nStopping services...")
-        
-        # Terminate processes
-        backend_process.terminate()
-        frontend_process.terminate()
-        
-        # Ensure they are killed on Windows
-        if sys.platform == "win32":
-            subprocess.run(["taskkill", "/F", "/T", "/PID", str(backend_process.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            subprocess.run(["taskkill", "/F", "/T", "/PID", str(frontend_process.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        
-        print("All services stopped.")
+        pass
+
+
+def _stop_process(proc):
+    """Stop a service and its children, escalating to kill if it hangs."""
+    if proc.poll() is not None:
+        return
+    if sys.platform == "win32":
+        # Reaches the whole process group created with CREATE_NEW_PROCESS_GROUP
+        proc.send_signal(signal.CTRL_BREAK_EVENT)
+    else:
+        proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
 
 if __name__ == "__main__":
     run_services()